@@ -0,0 +1,203 @@
+import os
+import codecs
+import collections
+from ud import UDSentence
+from factory import TokenFactory
+from dictutils import UDDictionary
+from sentindex import loadIndex, readSentenceLines
+
+# Library interface to the checker, for use from other Python code
+# without going through main.py. Build one Checker per language and
+# reuse it; the lexicon and .sic data are only loaded once.
+
+sicDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sic')
+
+# keys are line numbers, values are dicts whose keys are features that
+# have been verified as correct on that line
+def loadSicFile(conlluFilename, directory=sicDirectory):
+  answer = dict()
+  if conlluFilename!=None and conlluFilename!='<stdin>':
+    sicFileName = os.path.basename(conlluFilename).replace('.conllu','.sic')
+    try:
+      sicFile = open(os.path.join(directory, sicFileName))
+      for line in sicFile:
+        lineNum, feat = line.rstrip('\n').split('\t')
+        lineNum = int(lineNum)
+        if lineNum not in answer:
+          answer[lineNum] = dict()
+        answer[lineNum][feat] = 1
+      sicFile.close()
+    except IOError:
+      pass  # no big deal if there's no .sic file
+  return answer
+
+# Gives any iterable of lines the readline() that UDSentence expects.
+# Lines may come with or without newlines, and a final sentence
+# without a blank line after it is not lost.
+class LineReader:
+
+  def __init__(self, lines):
+    self._lines = iter(lines)
+    self._lastBlank = True
+    self._done = False
+
+  def readline(self):
+    if self._done:
+      return ''
+    try:
+      line = next(self._lines)
+    except StopIteration:
+      self._done = True
+      return '' if self._lastBlank else '\n'
+    if not line.endswith('\n'):
+      line += '\n'
+    self._lastBlank = (line.rstrip('\r\n') == '')
+    return line
+
+class Checker:
+
+  # lexicon can be a UDDictionary, the name of a tagdict.tsv file
+  # (loaded lazily, see UDDictionary), or None to skip lexicon checks
+  def __init__(self, languageCode, lexicon=None, sicDir=sicDirectory):
+    self._languageCode = languageCode.upper()
+    self._factory = TokenFactory(self._languageCode)
+    if isinstance(lexicon, UDDictionary):
+      self._lexicon = lexicon
+    else:
+      self._lexicon = UDDictionary(lexicon, lazy=True)
+    self._sicDir = sicDir
+    # keys are file names, values as returned by loadSicFile
+    self._verified = dict()
+
+  def getLexicon(self):
+    return self._lexicon
+
+  def _getVerified(self, fileName):
+    if fileName not in self._verified:
+      self._verified[fileName] = loadSicFile(fileName, self._sicDir)
+    return self._verified[fileName]
+
+  # yields a UDSentence for each sentence in lines; fileName is only
+  # used to find the matching .sic file, if any
+  def _sentences(self, lines, fileName):
+    verified = self._getVerified(fileName)
+    reader = LineReader(lines)
+    lineNumber = 0
+    while True:
+      sentence = UDSentence(self._languageCode, self._factory)
+      lineNumber = sentence.loadFromStream(reader, lineNumber, verified)
+      if lineNumber == -1:
+        return
+      if not sentence.isEmpty():
+        yield sentence
+
+  # yields UDSentence objects with features normalized; no checks are run
+  def read_stream(self, lines, fileName=None):
+    return self._sentences(lines, fileName)
+
+  # yields checked UDSentence objects; use getWarnings(),
+  # getWarningRecords(), reportString() or conlluString() on them.
+  # With dedup (a SentenceDeduplicator), sentences identical to ones
+  # seen before aren't checked again but get the same warnings.
+  def check_stream(self, lines, fileName=None, dedup=None):
+    for sentence in self._sentences(lines, fileName):
+      if dedup != None:
+        dedup.check(sentence, self._lexicon, fileName)
+      else:
+        sentence.runChecks(self._lexicon)
+      yield sentence
+
+  # yields the CoNLL-U string of each sentence with features normalized;
+  # no checks are run
+  def normalize_stream(self, lines, fileName=None):
+    for sentence in self._sentences(lines, fileName):
+      yield sentence.conlluString()
+
+  # lines make up one sentence, lineNumber is that of the line before it
+  def _checkLines(self, lines, lineNumber, verified):
+    sentence = UDSentence(self._languageCode, self._factory)
+    sentence.loadFromStream(LineReader(lines), lineNumber, verified)
+    sentence.runChecks(self._lexicon)
+    return sentence
+
+  # Async version of check_stream: source is an async iterable of str or
+  # bytes (UTF-8), in lines or chunks of any size. Checking happens on
+  # executor (the loop's default thread pool if None), with at most
+  # window sentences in flight; we stop reading from source while the
+  # window is full. Sentences come out in input order. The threads share
+  # the lexicon, which serializes its own lookups.
+  async def acheck_stream(self, source, executor=None, window=8, fileName=None):
+    # imported here since it adds noticeably to start-up time
+    import asyncio
+    loop = asyncio.get_running_loop()
+    source = source.__aiter__()
+    verified = self._getVerified(fileName)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    inFlight = collections.deque()
+    pending = ''
+    sentenceLines = list()
+    startLine = 0
+    lineNumber = 0
+    atEnd = False
+    while not atEnd:
+      try:
+        chunk = await source.__anext__()
+      except StopAsyncIteration:
+        atEnd = True
+        chunk = b''
+      if isinstance(chunk, bytes):
+        chunk = decoder.decode(chunk, final=atEnd)
+      pending += chunk
+      lines = pending.split('\n')
+      pending = lines.pop()
+      if atEnd and pending != '':
+        lines.append(pending)
+      if atEnd:
+        lines.append('')
+      for line in lines:
+        lineNumber += 1
+        if line.rstrip('\r') != '':
+          if not sentenceLines:
+            startLine = lineNumber - 1
+          sentenceLines.append(line)
+        elif sentenceLines:
+          inFlight.append(loop.run_in_executor(executor, self._checkLines, sentenceLines, startLine, verified))
+          sentenceLines = list()
+          while len(inFlight) >= window:
+            yield await inFlight.popleft()
+    while inFlight:
+      yield await inFlight.popleft()
+
+  # the sent_ids in sentIDs that no sentence in file fileName has
+  def missing_sent_ids(self, fileName, sentIDs):
+    index = loadIndex(fileName)
+    return [sentID for sentID in sentIDs if sentID not in index]
+
+  # Yields the sentences of file fileName with the given sent_ids, in
+  # that order, reading only those sentences (see sentindex.py). Raises
+  # ValueError, before yielding anything, if a sent_id isn't in the file.
+  def read_sentences(self, fileName, sentIDs):
+    index = loadIndex(fileName)
+    for sentID in sentIDs:
+      if sentID not in index:
+        raise ValueError('No sentence with sent_id '+sentID+' in '+fileName)
+    verified = self._getVerified(fileName)
+    with open(fileName, 'rb') as f:
+      for sentID in sentIDs:
+        for entry in index[sentID]:
+          sentence = UDSentence(self._languageCode, self._factory)
+          sentence.loadFromStream(LineReader(readSentenceLines(f, entry)), entry[2], verified)
+          yield sentence
+
+  # as read_sentences, but checked
+  def check_sentences(self, fileName, sentIDs):
+    for sentence in self.read_sentences(fileName, sentIDs):
+      sentence.runChecks(self._lexicon)
+      yield sentence
+
+  # text is a single sentence in CoNLL-U format; returns checked UDSentence
+  def check_sentence(self, text):
+    sentences = list(self.check_stream(text.strip('\n').split('\n')))
+    if len(sentences) != 1:
+      raise ValueError('Expected exactly one sentence, found '+str(len(sentences)))
+    return sentences[0]
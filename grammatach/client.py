@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import socket
+import tempfile
+
+# Client for daemon.py; deliberately imports nothing from the checker
+# itself so that it starts up quickly.
+#
+# Protocol is one JSON object per line in each direction. Request:
+#   {"lang": "ga", "conllu": "..."}
+# Response:
+#   {"sentences": [{"sent_id": ..., "conllu": ..., "warnings": [...]}, ...]}
+# or {"error": "..."} if something went wrong.
+
+# one per user, since the daemon only accepts connections from its owner
+defaultSocketPath = os.path.join(tempfile.gettempdir(), 'grammatach-'+str(os.getuid())+'.sock')
+
+def printUsage():
+  print("Usage: python3 client.py [ga|gd|gv] [-s socket] [-r] [input-conllu-file]")
+  print("       Sends the input to a running daemon.py for checking.")
+  print("       Use option -r to output a report of potential issues.")
+  print("       Otherwise, a modified CONLLU file is output.")
+
+def popSocketOption(args):
+  socketPath = defaultSocketPath
+  if '-s' in args:
+    i = args.index('-s')
+    socketPath = args[i+1]
+    del args[i:i+2]
+  return socketPath
+
+# returns list of per-sentence dicts as described at the top of the file
+def sendCheckRequest(socketPath, languageCode, text):
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+    sock.connect(socketPath)
+    sock.sendall((json.dumps({'lang': languageCode, 'conllu': text}, ensure_ascii=False)+'\n').encode('utf-8'))
+    with sock.makefile('rb') as f:
+      response = json.loads(f.readline())
+  if 'error' in response:
+    raise RuntimeError(response['error'])
+  return response['sentences']
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  socketPath = popSocketOption(args)
+  if len(args)<1 or len(args)>3 or args[0] not in ['ga', 'gd', 'gv']:
+    printUsage()
+    sys.exit(1)
+  languageCode = args.pop(0)
+  outputReport = False
+  if len(args)>0 and args[0]=='-r':
+    outputReport = True
+    args.pop(0)
+  inputStream = sys.stdin
+  if len(args)>0:
+    try:
+      inputStream = open(args[0])
+    except IOError:
+      print("Failed to read input file", args[0])
+      sys.exit(1)
+  sentences = sendCheckRequest(socketPath, languageCode, inputStream.read())
+  if inputStream is not sys.stdin:
+    inputStream.close()
+  # same layout as main.py's output
+  for s in sentences:
+    if outputReport:
+      if s['warnings']:
+        sys.stdout.write('\n')
+        for w in s['warnings']:
+          sys.stdout.write('\n'+w)
+    else:
+      print(s['conllu'])
+  if outputReport:
+    sys.stdout.write('\n')
@@ -0,0 +1,128 @@
+import sys
+import os
+import io
+import json
+import stat
+import socket
+import socketserver
+import threading
+from snapshot import loadChecker
+from client import popSocketOption
+
+# Long-running checker: keeps the language modules and lexicons loaded
+# and checks CoNLL-U sent over a Unix domain socket, so editor hooks
+# don't pay the start-up cost on every save. See client.py for the
+# protocol and a command-line client.
+
+def printUsage():
+  print("Usage: python3 daemon.py [-s socket] [ga=tagdict.tsv ...] [ga+=delta.tsv ...]")
+  print("       Serves check requests from client.py until killed.")
+  print("       Optional arguments give the lexicon to use for each language,")
+  print("       and delta files whose new lines are picked up before each request.")
+
+class CheckerPool:
+
+  # lexiconFiles maps language codes to tagdict.tsv paths, and
+  # deltaFiles maps them to lists of delta file paths (both optional)
+  def __init__(self, lexiconFiles, deltaFiles=None):
+    self._lexiconFiles = lexiconFiles
+    if deltaFiles == None:
+      deltaFiles = dict()
+    self._deltaFiles = deltaFiles
+    self._checkers = dict()
+    # the lexicon caches aren't safe to update from several threads
+    self._lock = threading.Lock()
+
+  def _getChecker(self, languageCode):
+    if languageCode not in self._checkers:
+      checker = loadChecker(languageCode, self._lexiconFiles.get(languageCode))
+      for deltaFile in self._deltaFiles.get(languageCode, []):
+        checker.getLexicon().addDelta(deltaFile)
+      self._checkers[languageCode] = checker
+    checker = self._checkers[languageCode]
+    checker.getLexicon().refresh()
+    return checker
+
+  def check(self, languageCode, text):
+    if languageCode not in ['ga', 'gd', 'gv']:
+      raise ValueError('Unknown language code '+languageCode)
+    with self._lock:
+      checker = self._getChecker(languageCode)
+      return [{'sent_id': s.getSentID(), 'conllu': s.conlluString(), 'warnings': s.getWarnings()} for s in checker.check_stream(io.StringIO(text))]
+
+  # CoNLL-U string of each sentence with features normalized; no checks
+  def normalize(self, languageCode, text):
+    if languageCode not in ['ga', 'gd', 'gv']:
+      raise ValueError('Unknown language code '+languageCode)
+    with self._lock:
+      checker = self._getChecker(languageCode)
+    return list(checker.normalize_stream(io.StringIO(text)))
+
+class CheckRequestHandler(socketserver.StreamRequestHandler):
+
+  def handle(self):
+    for line in self.rfile:
+      try:
+        request = json.loads(line)
+        response = {'sentences': self.server.pool.check(request['lang'], request['conllu'])}
+      except Exception as e:
+        response = {'error': repr(e)}
+      self.wfile.write((json.dumps(response, ensure_ascii=False)+'\n').encode('utf-8'))
+      self.wfile.flush()
+
+# Removes a socket left behind by a daemon that's no longer running.
+# Raises ValueError if socketPath is something else, or a live daemon's
+def removeStaleSocket(socketPath):
+  try:
+    mode = os.stat(socketPath).st_mode
+  except FileNotFoundError:
+    return
+  if not stat.S_ISSOCK(mode):
+    raise ValueError(socketPath+' exists and is not a socket')
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+    try:
+      sock.connect(socketPath)
+    except OSError:
+      os.remove(socketPath)
+      return
+  raise ValueError('A daemon is already listening on '+socketPath)
+
+class CheckServer(socketserver.ThreadingUnixStreamServer):
+  daemon_threads = True
+
+  # only the user running the daemon can connect to it
+  def __init__(self, socketPath, pool):
+    removeStaleSocket(socketPath)
+    oldUmask = os.umask(0o177)
+    try:
+      super().__init__(socketPath, CheckRequestHandler)
+    finally:
+      os.umask(oldUmask)
+    os.chmod(socketPath, 0o600)
+    self.pool = pool
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  socketPath = popSocketOption(args)
+  if any('=' not in arg for arg in args):
+    printUsage()
+    sys.exit(1)
+  lexiconFiles = dict()
+  deltaFiles = dict()
+  for arg in args:
+    if '+=' in arg:
+      languageCode, deltaFile = arg.split('+=', 1)
+      deltaFiles.setdefault(languageCode, list()).append(deltaFile)
+    else:
+      languageCode, lexiconFile = arg.split('=', 1)
+      lexiconFiles[languageCode] = lexiconFile
+  try:
+    server = CheckServer(socketPath, CheckerPool(lexiconFiles, deltaFiles))
+  except ValueError as e:
+    sys.stderr.write(str(e)+'\n')
+    sys.exit(1)
+  try:
+    server.serve_forever()
+  finally:
+    server.server_close()
+    os.remove(socketPath)
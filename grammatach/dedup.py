@@ -0,0 +1,79 @@
+import hashlib
+
+# Lets exact duplicate sentences be checked only once. Sentences count as
+# duplicates if they have the same tokens, lemmas, UPOS, FEATS, heads,
+# deprels and .sic entries, since nothing else affects the checks. The
+# warnings found for the first copy are kept (without the sentence) and
+# given to each later copy's own tokens, so line numbers are right.
+# Use one SentenceDeduplicator across several files to also catch
+# duplicates between them.
+
+# digest of the parts of a sentence the checks depend on
+def sentenceDigest(sentence, generation):
+  h = hashlib.blake2b(digest_size=16)
+  h.update(str(generation).encode('ascii'))
+  for t in sentence:
+    h.update(b'\n')
+    h.update(t.contentString().encode('utf-8'))
+  return h.digest()
+
+# e.g. "train-s12 (line 345)", with the file name if there's one
+def describeLocation(location):
+  fileName, sentID, lineNumber = location
+  answer = str(sentID)+' (line '+str(lineNumber)+')'
+  if fileName != None:
+    answer = fileName+': '+answer
+  return answer
+
+class SentenceDeduplicator:
+
+  def __init__(self):
+    # keys are digests; values are None if there were no warnings, else
+    # lists of (message, feature, constraint) lists, one for each token
+    self._warnings = dict()
+    # keys are digests, values are (file, sent_id, line) of first copy
+    self._firstCopy = dict()
+    # keys are digests, values are lists of locations of later copies
+    self._duplicates = dict()
+    self._checked = 0
+    self._skipped = 0
+
+  # runs the checks on sentence, unless an identical one was seen before
+  def check(self, sentence, lexicon, fileName=None):
+    digest = sentenceDigest(sentence, lexicon.getGeneration())
+    location = (fileName, sentence.getSentID(), sentence.getFirstLineNumber())
+    if digest in self._warnings:
+      self._skipped += 1
+      self._duplicates.setdefault(digest, list()).append(location)
+      warnings = self._warnings[digest]
+      # any warnings from linking up the tree are among those replayed
+      sentence.elaborateGraph()
+      for i, t in enumerate(sentence):
+        t.clearWarnings()
+        if warnings != None:
+          for message, feature, constraint in warnings[i]:
+            t.addWarning(message, feature, constraint)
+      return
+    self._checked += 1
+    sentence.runChecks(lexicon)
+    self._firstCopy[digest] = location
+    if sentence.hasWarnings():
+      self._warnings[digest] = [[(w.getMessage(), w.getFeature(), w.getConstraint()) for w in t.getWarningRecords()] for t in sentence]
+    else:
+      self._warnings[digest] = None
+
+  # returns (sentences checked, duplicates not checked)
+  def getCounts(self):
+    return (self._checked, self._skipped)
+
+  # list of lists of locations, first copy first; only sentences that
+  # appeared more than once, biggest clusters first
+  def getClusters(self):
+    clusters = [[self._firstCopy[d]] + self._duplicates[d] for d in self._duplicates]
+    return sorted(clusters, key=lambda c: -len(c))
+
+  def writeClusters(self, stream):
+    checked, skipped = self.getCounts()
+    stream.write('# '+str(skipped)+' duplicate sentences of '+str(checked+skipped)+' not checked again\n')
+    for cluster in self.getClusters():
+      stream.write(str(len(cluster))+'\t'+'\t'.join(describeLocation(l) for l in cluster)+'\n')
@@ -1,4 +1,7 @@
 import re
+import gc
+import bisect
+import threading
 
 def featureStringToDict(features):
   ans = dict()
@@ -11,51 +14,179 @@ def featureStringToDict(features):
 def isSubset(featDict1, featDict2):
   return all(k in featDict2 and featDict1[k]==featDict2[k] for k in featDict1)
 
+# keys are surface forms, values are dictionaries whose keys
+# are possible lemmas for that surface form and whose values
+# are more dictionaries. Keys of those dictionaries are possible
+# POS tags for the given surface/lemma pair, and whose values
+# are a list of dictionaries of feature/feature-values
+# Lexicon feature dicts are never modified, so identical ones can be
+# shared via sharedFeats (keys are feature strings)
+# Returns the surface form of the entry that was added
+def addLexiconLine(words, line, sharedFeats):
+  fields = line.rstrip('\n').split('\t')
+  if fields[4] not in sharedFeats:
+    sharedFeats[fields[4]] = featureStringToDict(fields[4])
+  if fields[0] not in words:
+    words[fields[0]] = dict()
+  if fields[1] not in words[fields[0]]:
+    words[fields[0]][fields[1]] = dict()
+  if fields[2] not in words[fields[0]][fields[1]]:
+    words[fields[0]][fields[1]][fields[2]] = list()
+  words[fields[0]][fields[1]][fields[2]].append(sharedFeats[fields[4]])
+  return fields[0]
+
+# Runs fn with the cyclic garbage collector off; building millions of
+# small dicts otherwise triggers repeated, pointless full collections
+def withoutGC(fn, *args):
+  wasEnabled = gc.isenabled()
+  gc.disable()
+  try:
+    return fn(*args)
+  finally:
+    if wasEnabled:
+      gc.enable()
+
+def _readLexiconFile(fileName):
+  words = dict()
+  sharedFeats = dict()
+  with open(fileName) as f:
+    for line in f:
+      addLexiconLine(words, line, sharedFeats)
+  return words
+
+def readLexiconFile(fileName):
+  return withoutGC(_readLexiconFile, fileName)
+
 class UDDictionary:
 
-  def __init__(self, fileName=None):
-    # keys are surface forms, values are dictionaries whose keys
-    # are possible lemmas for that surface form and whose values
-    # are more dictionaries. Keys of those dictionaries are possible
-    # POS tags for the given surface/lemma pair, and whose values
-    # are a list of dictionaries of feature/feature-values
+  # With lazy=True the file is only split into lines and sorted by
+  # surface form; the lines for a surface form are parsed into _words
+  # the first time it's looked up, so a corpus only pays for the
+  # entries it uses
+  def __init__(self, fileName=None, lazy=False):
     self._words = dict()
+    # for a lazy lexicon, the lines of the file, the surface forms in
+    # sorted order, and for each of those the line it came from
+    self._lines = None
+    self._surfaces = None
+    self._order = None
+    # bumped every time a delta file adds entries; _changedAt records
+    # the generation at which each surface form last changed, and
+    # _cache maps (surface, lemma, upos, feats) to (generation, problem)
+    self._generation = 0
+    self._changedAt = dict()
+    self._cache = dict()
+    # keys are delta file names, values are byte offsets already applied
+    self._deltas = dict()
+    self._sharedFeats = dict()
+    # lookups and deltas both update the dicts above, and a Checker's
+    # lexicon is shared by the threads of acheck_stream, daemon.py etc.
+    self._lock = threading.Lock()
     if fileName != None:
-      self._readFromFile(fileName)
-
-  def _readFromFile(self, fileName):
-    with open(fileName) as f:
-      for line in f:
-        line = line.rstrip('\n')
-        fields = line.split('\t')
-        if fields[0] not in self._words:
-          self._words[fields[0]] = dict()
-        if fields[1] not in self._words[fields[0]]:
-          self._words[fields[0]][fields[1]] = dict()
-        if fields[2] not in self._words[fields[0]][fields[1]]:
-          self._words[fields[0]][fields[1]][fields[2]] = list()
-        self._words[fields[0]][fields[1]][fields[2]].append(featureStringToDict(fields[4]))
-      f.close()
+      if lazy:
+        with open(fileName) as f:
+          self._lines = [line for line in f.read().split('\n') if line != '']
+        surfaces = [line.partition('\t')[0] for line in self._lines]
+        # sorted() is stable, so each surface form's lines stay in file order
+        self._order = sorted(range(len(surfaces)), key=surfaces.__getitem__)
+        self._surfaces = [surfaces[i] for i in self._order]
+      else:
+        self._words = readLexiconFile(fileName)
+
+  # for pickling (see snapshot.py); a lock can't be pickled
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  # the entries for surface form surf as described above addLexiconLine,
+  # or None if there aren't any. A lazily parsed form is built up on its
+  # own and added to _words in one go, so no one ever sees half of it
+  def _entries(self, surf):
+    if self._lines != None and surf not in self._words:
+      words = dict()
+      i = bisect.bisect_left(self._surfaces, surf)
+      while i < len(self._surfaces) and self._surfaces[i] == surf:
+        addLexiconLine(words, self._lines[self._order[i]], self._sharedFeats)
+        i += 1
+      if surf in words:
+        self._words[surf] = words[surf]
+    return self._words.get(surf)
+
+  def getGeneration(self):
+    return self._generation
+
+  # Delta files are in the same format as the main lexicon, and
+  # lexicographers only ever append to them. Returns set of surface
+  # forms that gained entries
+  def addDelta(self, fileName):
+    if fileName not in self._deltas:
+      self._deltas[fileName] = 0
+    return self._applyDelta(fileName)
+
+  # apply anything appended to the delta files since the last call
+  def refresh(self):
+    changed = set()
+    for fileName in self._deltas:
+      changed |= self._applyDelta(fileName)
+    return changed
+
+  # a final line without a newline might still be being written,
+  # so it's left for the next refresh
+  def _applyDelta(self, fileName):
+    changed = set()
+    with open(fileName, 'rb') as f:
+      f.seek(self._deltas[fileName])
+      newBytes = f.read()
+    complete = newBytes[:newBytes.rfind(b'\n')+1]
+    with self._lock:
+      for line in complete.decode('utf-8').splitlines():
+        if line != '':
+          # a lazy lexicon's own entries for this form must come first
+          self._entries(line.partition('\t')[0])
+          changed.add(addLexiconLine(self._words, line, self._sharedFeats))
+      self._deltas[fileName] += len(complete)
+      if changed:
+        self._generation += 1
+        for surf in changed:
+          self._changedAt[surf] = self._generation
+    return changed
 
   # return '' if everything is OK and an error message if not
   def lookup(self, tok):
-    if not self._words:
+    if not self._words and not self._lines:
       return ''
     surf = tok['token']
     if tok['lemma'].islower() and not surf.islower():
-      surf = self.lowerToken()
+      surf = tok.lowerToken()
     if tok['upos'] in ['PROPN', 'PUNCT', 'SYM', 'X']:
       return ''
     if tok['upos']=='NUM' and re.search('[0-9]',surf):
       return ''
     if tok.has('Typo','Yes'):
       return ''
-    if surf not in self._words:
-      return str(tok)+' Surface token not in lexicon'
-    if tok['lemma'] not in self._words[surf]:
-      return str(tok)+' Known surface form, but lemma not in lexicon'
-    if tok['upos'] not in self._words[surf][tok['lemma']]:
-      return str(tok)+' Known surface form and lemma, but not with this POS'
-    if not any(isSubset(lexFeatDict, tok.getFeatureDict()) for lexFeatDict in self._words[surf][tok['lemma']][tok['upos']]):
-      return str(tok)+' No feature set in lexicon for this surface/lemma/POS matches token feats'
+    key = (surf, tok['lemma'], tok['upos'], tuple(sorted(tok.getFeatureDict().items())))
+    with self._lock:
+      cached = self._cache.get(key)
+      if cached == None or cached[0] < self._changedAt.get(surf, 0):
+        cached = (self._generation, self._findProblem(surf, tok))
+        self._cache[key] = cached
+    if cached[1] == '':
+      return ''
+    return str(tok)+' '+cached[1]
+
+  def _findProblem(self, surf, tok):
+    entries = self._entries(surf)
+    if entries == None:
+      return 'Surface token not in lexicon'
+    if tok['lemma'] not in entries:
+      return 'Known surface form, but lemma not in lexicon'
+    if tok['upos'] not in entries[tok['lemma']]:
+      return 'Known surface form and lemma, but not with this POS'
+    if not any(isSubset(lexFeatDict, tok.getFeatureDict()) for lexFeatDict in entries[tok['lemma']][tok['upos']]):
+      return 'No feature set in lexicon for this surface/lemma/POS matches token feats'
     return ''
@@ -1,11 +1,27 @@
-from ga import GAToken
-from gd import GDToken
-from gv import GVToken
+import importlib
 
 class TokenFactory:
 
+  # The language module (ga, gd or gv) is only imported here, so e.g.
+  # a Manx run never loads the Irish code and data. Make one factory
+  # per corpus and share it between sentences.
   def __init__(self, languageCode):
-    self._languageCode = languageCode
+    self._languageCode = languageCode.upper()
+    module = importlib.import_module(languageCode.lower())
+    self._tokenClass = getattr(module, self._languageCode+'Token')
+    # every sentence's root is a copy of this; see createRoot
+    self._root = None
 
   def createToken(self, lineNumber=None, line=None):
-    return globals()[self._languageCode+'Token'](lineNumber, line)
+    return self._tokenClass(lineNumber, line)
+
+  # the root token for a new sentence, without parsing a line for it
+  def createRoot(self):
+    if self._root == None:
+      self._root = self._tokenClass()
+    return self._root.copyRoot()
+
+  # numberedLines is a list of (lineNumber, line) pairs
+  def createTokens(self, numberedLines):
+    tokenClass = self._tokenClass
+    return [tokenClass(lineNumber, line) for lineNumber, line in numberedLines]
@@ -6,6 +6,7 @@ from rules import Constraint
 class GAToken(GoidelicToken):
 
   def __init__(self, lineNumber=None, line=None):
+    self._objectOfGenitivePrep = None   # see isObjectOfGenitivePrep
     super().__init__(lineNumber, line)
 
   # don't want these as constraints since then a word mutated for no
@@ -140,7 +141,7 @@ class GAToken(GoidelicToken):
     return re.match(r'h-?[aeiouáéíóúAEIOUÁÉÍÓÚ]', self['token']) and self.admitsPrefixH()
 
   def hasPrecedingDependent(self):
-    return any(t['index']<self['index'] and t['deprel'] not in ['case','cc'] for t in self.getDependents())
+    return any(t['deprel'] not in ['case','cc'] for t in self.getPrecedingDependents())
 
   def precedingCen(self):
     head = self.getHead()
@@ -183,39 +184,52 @@ class GAToken(GoidelicToken):
     return self.isNominal() and self['deprel']=='obj' and hd['index']<self['index'] and hd.has('VerbForm','Vnoun')
 
   def isPossessed(self):
-    return any(t.has('Poss','Yes') for t in self.getDependents())
+    return self.hasPossessiveDependent()
 
   def hasGachDependent(self):
-    return any(t['lemma'] in ['gach', 'gach_uile'] and t['upos']=='DET' for t in self.getDependents())
+    return any(t['lemma'] in ['gach', 'gach_uile'] for t in self.getDependentsByUpos('DET'))
 
   def isQualifiedNoun(self):
-    return self.isNominal() and any((t.isNominal() and t.has('Case','Gen')) or (t['upos']=='ADJ' and t['deprel']=='amod') for t in self.getDependents())
+    return self.isNominal() and \
+           (any(t['upos']=='ADJ' for t in self.getDependentsByDeprel('amod')) or \
+            any(t.has('Case','Gen') for t in self.getDependentsByUpos('NOUN')) or \
+            any(t.has('Case','Gen') for t in self.getDependentsByUpos('PROPN')))
 
   def isGodti(self):
     return self['lemma']=='go' and self.has('PrepForm','Cmpd') and any(t['lemma']=='dtí' for t in self.getDependents())
 
   def isObjectOfGenitivePrepHelp(self):
     genPreps = ['chun','cois','dála','fearacht','timpeall','trasna']
-    return self.isNominal() and self['VerbForm']==None and any(t['upos']=='ADP' and t.getDeprel()=='case' and not t.isGodti() and (t.has('PrepForm','Cmpd') or t['lemma'] in genPreps) for t in self.getDependents())
+    return self.isNominal() and self['VerbForm']==None and any(t['upos']=='ADP' and not t.isGodti() and (t.has('PrepForm','Cmpd') or t['lemma'] in genPreps) for t in self.getDependentsByDeprel('case'))
 
+  # remembered, since it's asked again for every conj below self
   def isObjectOfGenitivePrep(self):
-    return self.isObjectOfGenitivePrepHelp() or (self['deprel']=='conj' and self.getHead().isObjectOfGenitivePrep())
+    if self._objectOfGenitivePrep == None:
+      self._objectOfGenitivePrep = self.isObjectOfGenitivePrepHelp() or \
+        (self.getFirstConjunct() is not self and self.getHead().isObjectOfGenitivePrep())
+    return self._objectOfGenitivePrep
 
   # First any is for "Airteagal III" or "rang 5"
   # Second any is for stuff like "bus a dó", "rang a 5"
+  # Either way it's the dependent straight after self, so the first following one
   def hasNumberSpecifier(self):
-    return any(t['upos']=='NUM' and t['index']==self['index']+1 and t['deprel']=='nmod' for t in self.getDependents()) or any(t['lemma']=='a' and t['upos']=='PART' and t.has('PartType','Num') and t['index']==self['index']+1 and t.getHead()['upos']=='NUM' and t.getHead()['deprel']=='nmod' and t.getHead()['index']==self['index']+2 for t in self.getDependents())
+    following = self.getFollowingDependents()
+    if len(following)==0 or following[0]['index']!=self['index']+1:
+      return False
+    t = following[0]
+    return (t['upos']=='NUM' and t['deprel']=='nmod') or (t['lemma']=='a' and t['upos']=='PART' and t.has('PartType','Num') and t.getHead()['upos']=='NUM' and t.getHead()['deprel']=='nmod' and t.getHead()['index']==self['index']+2)
 
   # nouns governing a definite noun in the genitive should be definite
   # *except* for cases like "rang Gaeilge", "leabhar Béarla", etc.
   def hasPropagatingDefiniteDependent(self, after=-1):
     if after==-1:
       after=self['index']
-    return any(t['index']>after and t.isGenitiveOfHead() and t['deprel']!='conj' and t.has('Definite','Def') and (t['lemma'] not in gadata.languages or t.anyPrecedingDefiniteArticle()) for t in self.getDependents())
+    candidates = self.getFollowingDependents() if after>=self['index'] else self.getDependents()
+    return any(t['index']>after and t.isGenitiveOfHead() and t['deprel']!='conj' and t.has('Definite','Def') and (t['lemma'] not in gadata.languages or t.anyPrecedingDefiniteArticle()) for t in candidates)
 
   # not necessarily preceding; e.g. "sa dá chogadh"
   def anyDependentDefiniteArticle(self):
-    return any(t.has('PronType','Art') for t in self.getDependents())
+    return self.hasArticleDependent()
 
   # verbal particles that lenite following verb as in C.O. 10.4.2
   def isLenitingVerbalParticle(self):
@@ -248,7 +262,7 @@ class GAToken(GoidelicToken):
   # go, i, ionsar, le, ó, roimh, trí, um
   def isInDativePP(self):
     nominativePrepositions = ['ach','amhail','gan','go','idir','mar','murach','ná','seachas']
-    return self.isInPP() and not any(t['lemma'] in nominativePrepositions and t['deprel']=='case' for t in self.getDependents())
+    return self.isInPP() and not any(t['lemma'] in nominativePrepositions for t in self.getDependentsByDeprel('case'))
 
   # upos is 'NUM' and value is between 2 and 19 (though doesn't check "déag")
   def is2Thru19(self):
@@ -311,8 +325,9 @@ class GAToken(GoidelicToken):
   def isGenitiveOfHeadHelp(self):
     return self.isNominal() and self['deprel']=='nmod' and not self.isInPP()
 
+  # only the first conjunct can have deprel nmod, so no need to check the others
   def isGenitiveOfHead(self):
-    return self.isGenitiveOfHeadHelp() or (self['deprel']=='conj' and self.getHead().isGenitiveOfHead())
+    return self.getFirstConjunct().isGenitiveOfHeadHelp()
 
   def isGenitivePosition(self):
     return self.isGenitiveOfHead() or self.isObjectOfGenitivePrep()
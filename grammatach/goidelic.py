@@ -1,4 +1,4 @@
-from token import UDToken
+from udtoken import UDToken
 from rules import Constraint
 
 class GoidelicToken(UDToken):
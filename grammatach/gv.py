@@ -20,6 +20,10 @@ class GVToken(GoidelicToken):
       self.addFeature('Form','HPref')
     else:
       self.killFeature('Form','HPref')
+    # set here rather than in predictPolarityAUX/PART so that normalizing
+    # a file without checking it gives the same CoNLL-U
+    if self.isNegativeForm():
+      self.addFeature('Polarity','Neg')
 
   # don't bother with Abbr, Foreign, Typo
   def checkableFeatures(self):
@@ -45,6 +49,12 @@ class GVToken(GoidelicToken):
 
 ####################### BOOLEAN METHODS ##########################
 
+  # see predictPolarityAUX and predictPolarityPART
+  def isNegativeForm(self):
+    tok = self['token'].lower()
+    return (self['upos']=='AUX' and tok in ['cha','nagh']) or \
+           (self['upos']=='PART' and tok in ['cha','chan','nagh','nar','nara'])
+
   # houney/sauin
   def isLenited(self):
     tok = self['token'].lower()
@@ -294,13 +304,11 @@ class GVToken(GoidelicToken):
 
   def predictPolarityAUX(self):
     if self['token'].lower() in ['cha','nagh']:
-      self.addFeature('Polarity','Neg')
       return [Constraint('Neg', 'Negative copula forms should have Polarity=Neg')]
     return []
 
   def predictPolarityPART(self):
     if self['token'].lower() in ['cha','chan','nagh','nar','nara']:
-      self.addFeature('Polarity','Neg')
       return [Constraint('Neg', 'Negative particles should have Polarity=Neg')]
     return []
 
@@ -0,0 +1,226 @@
+import sys
+import os
+import json
+import bisect
+import threading
+from checker import Checker
+from dictutils import UDDictionary
+
+# Language Server Protocol front end, for editing .conllu files with
+# the checker's warnings shown as diagnostics. Talks JSON-RPC on
+# stdin/stdout. Since each sentence is self-contained, an edit only
+# causes the sentence(s) it touches to be re-parsed and re-checked;
+# results for all other sentences are kept from the last check.
+
+def printUsage():
+  print("Usage: python3 lspserver.py [ga|gd|gv] [tagdict.tsv]")
+  print("       Language is taken from the file name when it starts with")
+  print("       ga_, gd_ or gv_ (as in the UD treebanks), else from the argument.")
+
+# seconds of quiet after an edit before re-checking
+debounceDelay = 0.15
+
+def isBlank(line):
+  return line.rstrip('\r') == ''
+
+# one sentence: lines [start, end) of the document
+class Block:
+
+  def __init__(self, start, end):
+    self.start = start
+    self.end = end
+    # list of (line offset within block, message, severity); None until checked
+    self.diagnostics = None
+    # (start, JSON text) as last published, so unmoved blocks cost nothing
+    self.published = None
+
+# returns list of Blocks covering the non-blank runs in lines[lo:hi]
+def splitBlocks(lines, lo, hi):
+  answer = list()
+  start = None
+  for i in range(lo, hi):
+    if isBlank(lines[i]):
+      if start != None:
+        answer.append(Block(start, i))
+        start = None
+    elif start == None:
+      start = i
+  if start != None:
+    answer.append(Block(start, hi))
+  return answer
+
+class ConlluDocument:
+
+  def __init__(self, text, checker):
+    self._checker = checker
+    self.setText(text)
+
+  def setText(self, text):
+    self._lines = text.split('\n')
+    self._blocks = splitBlocks(self._lines, 0, len(self._lines))
+
+  # change is an LSP TextDocumentContentChangeEvent; positions are
+  # taken as code points, which is the same as UTF-16 for Irish text
+  def applyChange(self, change):
+    if 'range' not in change:
+      self.setText(change['text'])
+      return
+    sL = change['range']['start']['line']
+    sC = change['range']['start']['character']
+    eL = change['range']['end']['line']
+    eC = change['range']['end']['character']
+    newLines = (self._lines[sL][:sC] + change['text'] + self._lines[eL][eC:]).split('\n')
+    self._lines[sL:eL+1] = newLines
+    delta = len(newLines) - (eL-sL+1)
+    # blocks that overlap or directly adjoin the edited lines have to be
+    # redone, since deleting/adding a blank line merges/splits sentences
+    starts = [b.start for b in self._blocks]
+    first = bisect.bisect_left([b.end for b in self._blocks], sL)
+    last = bisect.bisect_right(starts, eL+1)
+    lo = sL
+    hi = eL+1
+    if first < last:
+      lo = min(lo, self._blocks[first].start)
+      hi = max(hi, self._blocks[last-1].end)
+    for b in self._blocks[last:]:
+      b.start += delta
+      b.end += delta
+    self._blocks[first:last] = splitBlocks(self._lines, lo, hi+delta)
+
+  # checks any sentences that have changed since the last call, and
+  # returns LSP diagnostics for the whole document as a JSON array
+  def diagnosticsJSON(self):
+    fragments = list()
+    for b in self._blocks:
+      if b.diagnostics == None:
+        b.diagnostics = self._checkBlock(b)
+        b.published = None
+      if b.published == None or b.published[0] != b.start:
+        b.published = (b.start, ','.join(json.dumps(self._diagnostic(b.start+offset, message, severity), ensure_ascii=False) for offset, message, severity in b.diagnostics))
+      if b.published[1] != '':
+        fragments.append(b.published[1])
+    return '[' + ','.join(fragments) + ']'
+
+  def _diagnostic(self, line, message, severity):
+    return {'range': {'start': {'line': line, 'character': 0},
+                      'end': {'line': line, 'character': len(self._lines[line])}},
+            'severity': severity, 'source': 'grammatach', 'message': message}
+
+  def _checkBlock(self, b):
+    answer = list()
+    try:
+      for s in self._checker.check_stream(line.rstrip('\r') for line in self._lines[b.start:b.end]):
+        for w in s.getWarningRecords():
+          answer.append((w.getLineNumber()-1, w.getTokenString()+': '+w.getMessage(), 2))
+    except Exception as e:
+      answer.append((0, 'Could not check this sentence: '+repr(e), 1))
+    return answer
+
+class LanguageServer:
+
+  def __init__(self, inputStream, outputStream, languageCode, lexicon):
+    self._input = inputStream
+    self._output = outputStream
+    self._languageCode = languageCode
+    self._lexicon = lexicon
+    self._checkers = dict()
+    self._documents = dict()
+    self._timers = dict()
+    # held while touching documents; the timers run on other threads
+    self._lock = threading.Lock()
+    self._writeLock = threading.Lock()
+
+  def _readMessage(self):
+    headers = dict()
+    while True:
+      line = self._input.readline()
+      if len(line)==0:
+        return None
+      line = line.decode('ascii').rstrip('\r\n')
+      if line == '':
+        break
+      k, v = line.split(':', 1)
+      headers[k.strip().lower()] = v.strip()
+    return json.loads(self._input.read(int(headers['content-length'])))
+
+  def _send(self, message):
+    message['jsonrpc'] = '2.0'
+    self._sendBody(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+
+  def _sendBody(self, body):
+    with self._writeLock:
+      self._output.write(('Content-Length: '+str(len(body))+'\r\n\r\n').encode('ascii')+body)
+      self._output.flush()
+
+  # the lexicon given on the command line is only for that language
+  def _checkerFor(self, uri):
+    languageCode = self._languageCode
+    prefix = os.path.basename(uri)[:3]
+    if prefix in ['ga_', 'gd_', 'gv_']:
+      languageCode = prefix[:2]
+    if languageCode not in self._checkers:
+      lexicon = self._lexicon if languageCode==self._languageCode else None
+      self._checkers[languageCode] = Checker(languageCode, lexicon)
+    return self._checkers[languageCode]
+
+  def _publish(self, uri):
+    with self._lock:
+      if uri not in self._documents:
+        return
+      diagnostics = self._documents[uri].diagnosticsJSON()
+    # spliced in by hand to avoid re-encoding every diagnostic each time
+    self._sendBody(('{"jsonrpc":"2.0","method":"textDocument/publishDiagnostics","params":{"uri":' +
+                    json.dumps(uri) + ',"diagnostics":' + diagnostics + '}}').encode('utf-8'))
+
+  def _schedule(self, uri):
+    if uri in self._timers:
+      self._timers[uri].cancel()
+    self._timers[uri] = threading.Timer(debounceDelay, self._publish, args=(uri,))
+    self._timers[uri].start()
+
+  def run(self):
+    while True:
+      message = self._readMessage()
+      if message == None:
+        return
+      method = message.get('method')
+      params = message.get('params', dict())
+      if method == 'initialize':
+        self._send({'id': message['id'], 'result': {
+          'capabilities': {'textDocumentSync': {'openClose': True, 'change': 2}},
+          'serverInfo': {'name': 'grammatach'}}})
+      elif method == 'shutdown':
+        self._send({'id': message['id'], 'result': None})
+      elif method == 'exit':
+        return
+      elif method == 'textDocument/didOpen':
+        uri = params['textDocument']['uri']
+        with self._lock:
+          self._documents[uri] = ConlluDocument(params['textDocument']['text'], self._checkerFor(uri))
+        self._schedule(uri)
+      elif method == 'textDocument/didChange':
+        uri = params['textDocument']['uri']
+        with self._lock:
+          for change in params['contentChanges']:
+            self._documents[uri].applyChange(change)
+        self._schedule(uri)
+      elif method == 'textDocument/didClose':
+        uri = params['textDocument']['uri']
+        with self._lock:
+          del self._documents[uri]
+        if uri in self._timers:
+          self._timers.pop(uri).cancel()
+        self._send({'method': 'textDocument/publishDiagnostics',
+                    'params': {'uri': uri, 'diagnostics': []}})
+      elif 'id' in message:
+        self._send({'id': message['id'], 'error': {'code': -32601, 'message': 'Method not found'}})
+
+if __name__ == '__main__':
+  if len(sys.argv)<2 or len(sys.argv)>3 or sys.argv[1] not in ['ga', 'gd', 'gv']:
+    printUsage()
+    sys.exit(1)
+  lexicon = UDDictionary(sys.argv[2] if len(sys.argv)>2 else None)
+  protocolStream = sys.stdout.buffer
+  # anything else printed (e.g. by UDSentence) mustn't corrupt the protocol
+  sys.stdout = sys.stderr
+  LanguageServer(sys.stdin.buffer, protocolStream, sys.argv[1], lexicon).run()
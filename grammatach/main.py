@@ -1,27 +1,25 @@
 import sys
-import os
-from ud import UDCorpus
+from checker import Checker
+from summary import WarningSummary
+from dedup import SentenceDeduplicator
 
 def printUsage():
-  print("Usage: python3 main.py [ga|gd|gv] [-r] [input-conllu-file]")
+  print("Usage: python3 main.py [ga|gd|gv] [-r|-j|-s] [-c|-p] [-o output-conllu-file] [-i sent_id,...] [-d] [input-conllu-file]")
   print("       Use option -r to output a report of potential issues.")
+  print("       Use option -j for the same issues as JSON, one per line.")
+  print("       Use option -s for counts of issues by rule and by lemma.")
   print("       Otherwise, a modified CONLLU file is output.")
-
-def loadSicFile(conlluFilename):
-  answer = dict()
-  if conlluFilename!='<stdin>':
-    sicFileName = os.path.basename(conlluFilename).replace('.conllu','.sic')
-    try:
-      sicFile = open('sic/'+sicFileName)
-      for line in sicFile:
-        lineNum, feat = line.rstrip('\n').split('\t')
-        lineNum = int(lineNum)
-        if lineNum not in answer:
-          answer[lineNum] = dict()
-        answer[lineNum][feat] = 1
-    except IOError:
-      pass  # no big deal if there's no .sic file
-  return answer
+  print("       Use option -o to write the modified CONLLU to a file; together")
+  print("       with -r, -j or -s this gives both outputs from a single run.")
+  print("       Use option -c to output only the sentences that were modified,")
+  print("       or -p for just the modified lines, each preceded by its line")
+  print("       number and sent_id.")
+  print("       Use option -i to read and check only the sentences with the")
+  print("       given sent_ids; needs an input file, which gets an index saved")
+  print("       next to it (as input-conllu-file.idx) for next time.")
+  print("       Use option -d to check each distinct sentence only once, copying")
+  print("       its issues to any duplicates; with -r or -s the groups of")
+  print("       duplicate sentences are listed at the end.")
 
 lexicons = {
   'ga': '/home/kps/gaeilge/parsail/treebank/tagdict.tsv',
@@ -29,33 +27,133 @@ lexicons = {
   'gv': '/home/kps/gaeilge/ga2gv/ga2gv/ud/tagdict.tsv'
 }
 
+# removes an option and its argument from sys.argv, returning the argument
+def popOption(option):
+  if option not in sys.argv:
+    return None
+  i = sys.argv.index(option)
+  if i+1 == len(sys.argv):
+    printUsage()
+    sys.exit(1)
+  value = sys.argv[i+1]
+  del sys.argv[i:i+2]
+  return value
+
+conlluFileName = popOption('-o')
+sentIDs = popOption('-i')
+
+changedOption = None   # or one of -c, -p
+for option in ['-c', '-p']:
+  if option in sys.argv:
+    if changedOption != None:
+      printUsage()
+      sys.exit(1)
+    changedOption = option
+    sys.argv.remove(option)
+
+dedup = None
+if '-d' in sys.argv:
+  dedup = SentenceDeduplicator()
+  sys.argv.remove('-d')
+
 if len(sys.argv)<2 or len(sys.argv)>4 or sys.argv[1] not in lexicons:
   printUsage()
   sys.exit(1)
 
-outputReport = False
+reportOption = None   # or one of -r, -j, -s
 inputStream = sys.stdin
 languageCode = sys.argv[1]
 if len(sys.argv)>2:
-  if sys.argv[2]=='-r':
-    outputReport = True
-    sys.argv.pop(2)
+  if sys.argv[2] in ['-r', '-j', '-s']:
+    reportOption = sys.argv.pop(2)
 if len(sys.argv)>2:
   try:
     inputStream = open(sys.argv[2])
   except IOError:
     print("Failed to read input file", sys.argv[2])
     sys.exit(1)
+if sentIDs != None and inputStream is sys.stdin:
+  printUsage()
+  sys.exit(1)
 
-c = UDCorpus(languageCode)
-c.loadFromStream(inputStream, loadSicFile(inputStream.name))
-if inputStream is not sys.stdin:
-  inputStream.close()
+# Sentences are read, checked and written one at a time, so memory use
+# doesn't grow with the size of the input or of the report
+lexicon = None
+#lexicon = lexicons[languageCode]
+checker = Checker(languageCode, lexicon)
 
-#c.runChecks(lexicons[languageCode])
-c.runChecks()
+# all sent_ids given with -i must be in the file, checked before any
+# output is written
+if sentIDs != None:
+  sentIDs = sentIDs.split(',')
+  missing = checker.missing_sent_ids(inputStream.name, sentIDs)
+  if missing:
+    sys.stderr.write('No sentence with sent_id '+', '.join(missing)+' in '+inputStream.name+'\n')
+    sys.exit(1)
 
-if outputReport:
-  print(c.reportString())
+# CoNLL-U goes to stdout unless there's a report to go there instead
+conlluStream = None
+if conlluFileName != None:
+  try:
+    conlluStream = open(conlluFileName, 'w')
+  except IOError:
+    print("Failed to open output file", conlluFileName)
+    sys.exit(1)
+elif reportOption == None:
+  conlluStream = sys.stdout
+
+# with -c or -p, unchanged sentences are never serialized
+def writeConllu(s, first):
+  if changedOption == '-p':
+    s.writePatch(conlluStream)
+    return first
+  if changedOption == '-c' and not s.isModified():
+    return first
+  if not first:
+    conlluStream.write('\n')
+  conlluStream.write(s.conlluString())
+  return False
+
+# sentences are only checked if there's a report to write
+if sentIDs != None:
+  if reportOption == None:
+    sentences = checker.read_sentences(inputStream.name, sentIDs)
+  else:
+    sentences = checker.check_sentences(inputStream.name, sentIDs)
+elif reportOption == None:
+  sentences = checker.read_stream(inputStream, inputStream.name)
 else:
-  print(c.conlluString())
+  sentences = checker.check_stream(inputStream, inputStream.name, dedup)
+
+first = True
+if reportOption == None:
+  for s in sentences:
+    first = writeConllu(s, first)
+else:
+  summary = WarningSummary()
+  for s in sentences:
+    if conlluStream != None:
+      first = writeConllu(s, first)
+    if reportOption == '-r':
+      if s.hasWarnings():
+        sys.stdout.write('\n')
+        s.writeReport(sys.stdout)
+    elif reportOption == '-j':
+      s.writeJSONL(sys.stdout)
+    else:
+      summary.add(s)
+  if reportOption == '-r':
+    sys.stdout.write('\n')
+  elif reportOption == '-s':
+    summary.write(sys.stdout)
+  if dedup != None and reportOption != '-j':
+    sys.stdout.write('\n')
+    dedup.writeClusters(sys.stdout)
+if conlluStream != None:
+  if changedOption != '-p':
+    conlluStream.write('\n')
+  if conlluStream is not sys.stdout:
+    conlluStream.close()
+
+if inputStream is not sys.stdin:
+  inputStream.close()
@@ -0,0 +1,172 @@
+import os
+import sys
+import pickle
+import itertools
+import gadata
+from ud import UDCorpus
+from dictutils import withoutGC
+
+# Index of the lemma and (lowercased) surface n-grams in a corpus, for
+# looking into rules that depend on the words before a token, like
+# isInPhrase or the checks after "ar", without grepping the raw files.
+# Locations are (file name, sent_id, line number of the n-gram's first
+# token); the sent_ids can be passed to main.py -i to check just those
+# sentences. An index can be saved and reloaded; it knows which files it
+# was built from and whether they've changed since.
+
+kinds = ['lemma', 'token']
+
+def tokenValue(t, kind):
+  return t['lemma'] if kind == 'lemma' else t['token'].lower()
+
+def fileStamp(fileName):
+  st = os.stat(fileName)
+  return (os.path.abspath(fileName), st.st_size, st.st_mtime_ns)
+
+class NgramIndex:
+
+  def __init__(self, maxN=3):
+    self._maxN = maxN
+    # keys are (kind, n), values are dicts from n-gram tuples to lists
+    # of locations
+    self._grams = dict()
+    for kind in kinds:
+      for n in range(1, maxN+1):
+        self._grams[(kind, n)] = dict()
+    self._stamps = list()
+
+  def getMaxN(self):
+    return self._maxN
+
+  def addCorpus(self, corpus, fileName=None):
+    if fileName != None:
+      self._stamps.append(fileStamp(fileName))
+    for sentence in corpus:
+      tokens = [t for t in sentence if not t.isMultiwordToken()]
+      sentID = sentence.getSentID()
+      for kind in kinds:
+        values = [tokenValue(t, kind) for t in tokens]
+        for i in range(len(tokens)):
+          location = (fileName, sentID, tokens[i].getLineNumber())
+          for n in range(1, min(self._maxN, len(tokens)-i)+1):
+            self._grams[(kind, n)].setdefault(tuple(values[i:i+n]), list()).append(location)
+
+  # True if none of the files indexed have changed since
+  def isCurrent(self):
+    try:
+      return all(fileStamp(f) == (f, size, mtime) for f, size, mtime in self._stamps)
+    except OSError:
+      return False
+
+  def getFileNames(self):
+    return [f for f, size, mtime in self._stamps]
+
+  # locations of one n-gram, e.g. find(('ar', 'ball'))
+  def find(self, gram, kind='lemma'):
+    if len(gram) > self._maxN:
+      raise ValueError('Index only goes up to '+str(self._maxN)+'-grams')
+    return self._grams[(kind, len(gram))].get(tuple(gram), [])
+
+  # options has a collection of allowed values for each position, or
+  # None for anything; yields (n-gram, locations) pairs, e.g.
+  # findMatching([['ar'], gadata.unlenitedAfterAr])
+  def findMatching(self, options, kind='lemma'):
+    n = len(options)
+    if n > self._maxN:
+      raise ValueError('Index only goes up to '+str(self._maxN)+'-grams')
+    grams = self._grams[(kind, n)]
+    if all(o != None for o in options):
+      for gram in itertools.product(*options):
+        if gram in grams:
+          yield (gram, grams[gram])
+    else:
+      for gram in grams:
+        if all(o == None or w in o for w, o in zip(gram, options)):
+          yield (gram, grams[gram])
+
+  # written to a temporary file first, as in snapshot.py
+  def save(self, fileName):
+    tmpFile = fileName + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpFile, 'wb') as f:
+      pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpFile, fileName)
+
+# returns None if there's no readable index in fileName
+def loadNgramIndex(fileName):
+  try:
+    with open(fileName, 'rb') as f:
+      return withoutGC(pickle.load, f)
+  except (IOError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+    return None
+
+def printUsage():
+  print("Usage: python3 ngrams.py [ga|gd|gv] [-x saved-index] conllu-file [conllu-file ...]")
+  print("       Reads queries from stdin, one per line: lemma or token, then")
+  print("       one item per word, each a word, alternatives like an|na, * for")
+  print("       anything, or @name for a word list in gadata.py, e.g.")
+  print("       lemma ar @unlenitedAfterAr")
+  print("       The index is saved with -x and reused while the files are unchanged.")
+
+# e.g. "lemma ar @unlenitedAfterAr" -> ('lemma', [{'ar'}, gadata.unlenitedAfterAr])
+def parseQuery(line):
+  words = line.split()
+  if len(words) < 2 or words[0] not in kinds:
+    raise ValueError('Queries start with '+' or '.join(kinds)+', then the words')
+  options = list()
+  for w in words[1:]:
+    if w == '*':
+      options.append(None)
+    elif w.startswith('@'):
+      if not hasattr(gadata, w[1:]):
+        raise ValueError('No word list '+w[1:]+' in gadata.py')
+      options.append(getattr(gadata, w[1:]))
+    else:
+      options.append(set(w.split('|')))
+  return words[0], options
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  savedIndex = None
+  if '-x' in args:
+    i = args.index('-x')
+    if i+1 == len(args):
+      printUsage()
+      sys.exit(1)
+    savedIndex = args[i+1]
+    del args[i:i+2]
+  if len(args) < 2 or args[0] not in ['ga', 'gd', 'gv']:
+    printUsage()
+    sys.exit(1)
+  fileNames = args[1:]
+  index = None
+  if savedIndex != None:
+    index = loadNgramIndex(savedIndex)
+    if index != None and (not index.isCurrent() or index.getFileNames() != [os.path.abspath(f) for f in fileNames]):
+      index = None
+  if index == None:
+    index = NgramIndex()
+    for fileName in fileNames:
+      corpus = UDCorpus(args[0])
+      try:
+        with open(fileName) as f:
+          corpus.loadFromStream(f, dict())
+      except IOError:
+        print("Failed to read input file", fileName)
+        sys.exit(1)
+      index.addCorpus(corpus, fileName)
+    if savedIndex != None:
+      index.save(savedIndex)
+  for line in sys.stdin:
+    if line.strip() == '':
+      continue
+    try:
+      kind, options = parseQuery(line)
+      n = 0
+      for gram, locations in index.findMatching(options, kind):
+        for fileName, sentID, lineNumber in locations:
+          n += 1
+          print(str(fileName)+':'+str(lineNumber)+'\t'+str(sentID)+'\t'+' '.join(gram))
+      print(str(n)+' matches')
+    except ValueError as e:
+      print('Error:', e)
+    sys.stdout.flush()
@@ -0,0 +1,246 @@
+import re
+import sys
+from ud import UDCorpus
+from udtoken import UDToken
+
+# Tree-pattern queries over loaded corpora, for trying out a rule's
+# conditions before writing it in ga.py. A pattern describes one token:
+#
+#   [upos=NOUN & Form!=Ecl & dep [lemma=i & deprel=case] & token=/^[bcdfgpt]/]
+#
+# Inside [...] are conditions joined by &:
+#   attr=v1|v2     any field (index, token, lemma, upos, head, deprel,
+#                  ...) as written in the file, so deprel=compound works,
+#                  or feature (Case, Form, ...) has one of these values;
+#                  None means a feature isn't set, /.../ is a regex
+#   attr!=v1|v2    the opposite
+#   head [...]     the token's head matches the pattern inside
+#   dep [...]      some dependent of the token matches
+#   pred [...]     the token just before it matches
+#   !cond          negates any condition, e.g. !dep [upos=DET]
+#
+# Each field and feature value has an inverted index, so only tokens
+# with a value asked for by one of the top-level conditions are tried.
+
+def printUsage():
+  print("Usage: python3 query.py [ga|gd|gv] [-c] conllu-file [conllu-file ...]")
+  print("       Reads patterns from stdin, one per line, and prints the")
+  print("       matching tokens for each, or just the count with -c.")
+
+tokenRegex = re.compile(r'\s*(?:(/(?:[^/\\]|\\.)*/)|(!=|[\[\]&!=|])|([^\s\[\]&!=|/]+))')
+
+relations = ['head', 'dep', 'pred']
+
+# CoNLL-U field names, matched with t.getField(); anything else is a feature
+fields = UDToken.labels
+
+def tokenize(text):
+  answer = list()
+  pos = 0
+  text = text.strip()
+  while pos < len(text):
+    m = tokenRegex.match(text, pos)
+    if not m or m.end() == pos:
+      raise ValueError('Cannot parse pattern at: '+text[pos:])
+    answer.append(m.group(1) or m.group(2) or m.group(3))
+    pos = m.end()
+  return answer
+
+# one attr=values or attr!=values condition
+class AttributeTest:
+
+  def __init__(self, attr, values, negated):
+    self.attr = attr
+    self.values = set(v for v in values if not v.startswith('/'))
+    self.regexes = [re.compile(v[1:-1]) for v in values if v.startswith('/')]
+    self.negated = negated
+
+  def _valuesOf(self, t):
+    if self.attr in fields:
+      return [t.getField(self.attr)]
+    answer = t[self.attr]
+    return ['None'] if answer == None else answer
+
+  def matches(self, t):
+    found = any(v in self.values or any(r.search(v) for r in self.regexes) for v in self._valuesOf(t))
+    return found != self.negated
+
+  # the index keys that every match must have one of, or None if
+  # this test can't narrow things down
+  def indexKeys(self):
+    if self.negated or self.regexes or 'None' in self.values:
+      return None
+    return [(self.attr, v) for v in self.values]
+
+class RelationTest:
+
+  def __init__(self, relation, node, negated):
+    self.relation = relation
+    self.node = node
+    self.negated = negated
+
+  def matches(self, t):
+    if self.relation == 'dep':
+      found = any(self.node.matches(d) for d in t.getDependents())
+    else:
+      other = t.getHead() if self.relation == 'head' else t.getPredecessor()
+      found = other != None and not other.isRoot() and self.node.matches(other)
+    return found != self.negated
+
+  def indexKeys(self):
+    return None
+
+class NodePattern:
+
+  def __init__(self, tests):
+    self.tests = tests
+
+  def matches(self, t):
+    return all(test.matches(t) for test in self.tests)
+
+class Parser:
+
+  def __init__(self, text):
+    self._tokens = tokenize(text)
+    self._pos = 0
+
+  def _peek(self):
+    return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+  def _next(self):
+    tok = self._peek()
+    if tok == None:
+      raise ValueError('Pattern ends too soon')
+    self._pos += 1
+    return tok
+
+  def _expect(self, tok):
+    found = self._next()
+    if found != tok:
+      raise ValueError('Expected '+tok+' but found '+found)
+
+  def parse(self):
+    node = self._node()
+    if self._peek() != None:
+      raise ValueError('Unexpected '+self._peek()+' after pattern')
+    return node
+
+  def _node(self):
+    self._expect('[')
+    tests = list()
+    if self._peek() != ']':
+      tests.append(self._condition(False))
+      while self._peek() == '&':
+        self._next()
+        tests.append(self._condition(False))
+    self._expect(']')
+    return NodePattern(tests)
+
+  def _condition(self, negated):
+    tok = self._next()
+    if tok == '!':
+      return self._condition(not negated)
+    # "head" is a field too, as in head=0
+    if tok in relations and self._peek() == '[':
+      return RelationTest(tok, self._node(), negated)
+    if tok in ['[', ']', '&', '|', '=', '!=']:
+      raise ValueError('Expected a condition but found '+tok)
+    op = self._next()
+    if op not in ['=', '!=']:
+      raise ValueError('Expected = or != after '+tok)
+    values = [self._next()]
+    while self._peek() == '|':
+      self._next()
+      values.append(self._next())
+    return AttributeTest(tok, values, negated != (op == '!='))
+
+# raises ValueError if text isn't a valid pattern
+def compileQuery(text):
+  return Parser(text).parse()
+
+class QueryIndex:
+
+  def __init__(self):
+    # (file name, sentence, token) for every token, in corpus order
+    self._tokens = list()
+    # keys are (attr, value), values are lists of positions in self._tokens
+    self._postings = dict()
+
+  def addCorpus(self, corpus, fileName=None):
+    for sentence in corpus:
+      for t in sentence:
+        if t.isMultiwordToken():
+          continue
+        position = len(self._tokens)
+        self._tokens.append((fileName, sentence, t))
+        for attr in fields:
+          self._postings.setdefault((attr, t.getField(attr)), list()).append(position)
+        for feat, vals in t.getFeatureDict().items():
+          for v in vals.split(','):
+            self._postings.setdefault((feat, v), list()).append(position)
+
+  def __len__(self):
+    return len(self._tokens)
+
+  # positions of the tokens worth trying, using the condition with the
+  # fewest candidates; all tokens if no condition can use the index
+  def _candidates(self, pattern):
+    best = None
+    for test in pattern.tests:
+      keys = test.indexKeys()
+      if keys != None:
+        lists = [self._postings.get(k, ()) for k in keys]
+        if best == None or sum(len(l) for l in lists) < sum(len(l) for l in best):
+          best = lists
+    if best == None:
+      return range(len(self._tokens))
+    if len(best) == 1:
+      return best[0]
+    return sorted(set(p for l in best for p in l))
+
+  # yields (file name, sentence, token) for each match, in corpus order
+  def find(self, pattern):
+    if isinstance(pattern, str):
+      pattern = compileQuery(pattern)
+    for position in self._candidates(pattern):
+      fileName, sentence, t = self._tokens[position]
+      if pattern.matches(t):
+        yield (fileName, sentence, t)
+
+  def count(self, pattern):
+    return sum(1 for m in self.find(pattern))
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  countOnly = False
+  if '-c' in args:
+    countOnly = True
+    args.remove('-c')
+  if len(args) < 2 or args[0] not in ['ga', 'gd', 'gv']:
+    printUsage()
+    sys.exit(1)
+  index = QueryIndex()
+  for fileName in args[1:]:
+    corpus = UDCorpus(args[0])
+    try:
+      with open(fileName) as f:
+        corpus.loadFromStream(f, dict())
+    except IOError:
+      print("Failed to read input file", fileName)
+      sys.exit(1)
+    index.addCorpus(corpus, fileName)
+  for line in sys.stdin:
+    if line.strip() == '':
+      continue
+    try:
+      pattern = compileQuery(line)
+    except (ValueError, re.error) as e:
+      print('Error:', e)
+      continue
+    n = 0
+    for fileName, sentence, t in index.find(pattern):
+      n += 1
+      if not countOnly:
+        print(fileName+':'+str(t.getLineNumber())+'\t'+str(sentence.getSentID())+'\t'+str(t))
+    print(str(n)+' matches')
+    sys.stdout.flush()
@@ -18,6 +18,7 @@ class Constraint:
     asList = value.split('|')
     self._forbidden = set(x[1:] for x in asList if x.startswith('!'))
     self._permitted = set(x for x in asList if not x.startswith('!'))
+    self._value = value
     self._message = message
 
   # pass list of feature values (so, ['Len'] or ['Ecl','Emp'], usually,
@@ -41,6 +42,66 @@ class Constraint:
 
   def getMessage(self):
     return self._message
+
+  # the constraint as written, e.g. "Ecl|Len|None" or "!Len"
+  def getValue(self):
+    return self._value
   
   def __str__(self):
     return 'Constraint that feature value ' + '|'.join(self._permitted) + ' must appear'
+
+
+# Caighdeán Oifigiúil section at the start of a message, e.g. "10.6.2.e1: ..."
+# or "10.2.1.c (An Córas Lárnach): ..."; several sections can be joined
+# with + or /, as in "10.4.1.b+c: ..." and "10.3.2.eii/10.7.a: ..."
+ruleIDRegex = re.compile('([0-9]+(?:[./+][0-9a-z]+)*)[: ]')
+
+# One problem found with one token. str() gives the line that appears in
+# reports; asDict() gives the same information as separate fields.
+# feature and constraint are None for warnings that don't come from a
+# Constraint, e.g. lexicon mismatches. Most warnings are only ever
+# written one way, so the fields are worked out when asked for.
+class UDWarning:
+
+  def __init__(self, token, message, feature=None, constraint=None):
+    self._token = token
+    self._message = message
+    self._feature = feature
+    self._constraint = constraint
+
+  def getLineNumber(self):
+    return self._token.getLineNumber()
+
+  # e.g. "(3,fear,fear,NOUN)"
+  def getTokenString(self):
+    return str(self._token)
+
+  def getLemma(self):
+    return self._token['lemma']
+
+  def getFeature(self):
+    return self._feature
+
+  # the Constraint that wasn't satisfied, or None
+  def getConstraint(self):
+    return self._constraint
+
+  def getMessage(self):
+    return self._message
+
+  # None if the message doesn't cite a section
+  def getRuleID(self):
+    m = ruleIDRegex.match(self._message)
+    return m.group(1) if m else None
+
+  def asDict(self, sentID=None):
+    t = self._token
+    return {'sent_id': sentID, 'line': t.getLineNumber(),
+            'index': None if t.isMultiwordToken() else t['index'],
+            'token': t['token'], 'lemma': t['lemma'], 'upos': t['upos'],
+            'feature': self._feature,
+            'constraint': None if self._constraint==None else self._constraint.getValue(),
+            'rule': self.getRuleID(), 'message': self._message}
+
+  def __str__(self):
+    return self._token.getLocator() + self._message
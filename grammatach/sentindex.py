@@ -0,0 +1,84 @@
+import io
+import os
+
+# Index of a CoNLL-U file giving, for each sent_id, where the sentence
+# is in the file: byte offset, length in bytes, and the number of lines
+# before it (so line numbers, and hence .sic files, still match when a
+# sentence is checked on its own). Built in one pass and saved next to
+# the file as a .idx file; rebuilt whenever the file's size or
+# modification time no longer match those recorded in it.
+
+def indexFileName(conlluFileName):
+  return conlluFileName + '.idx'
+
+def fileStamp(conlluFileName):
+  st = os.stat(conlluFileName)
+  return str(st.st_size)+'\t'+str(st.st_mtime_ns)
+
+# returns a dict whose keys are sent_ids and whose values are lists of
+# (offset, length, lines before) triples, one per sentence with that id
+def buildIndex(conlluFileName):
+  answer = dict()
+  offset = 0
+  lineNumber = 0
+  start = None
+  sentID = None
+  with open(conlluFileName, 'rb') as f:
+    for line in f:
+      if line.rstrip(b'\r\n') == b'':
+        if start != None and sentID != None:
+          answer.setdefault(sentID, list()).append((start[0], offset-start[0], start[1]))
+        start = None
+        sentID = None
+      else:
+        if start == None:
+          start = (offset, lineNumber)
+        if line.startswith(b'# sent_id = '):
+          sentID = line[12:].rstrip(b'\r\n').decode('utf-8')
+      offset += len(line)
+      lineNumber += 1
+  if start != None and sentID != None:
+    answer.setdefault(sentID, list()).append((start[0], offset-start[0], start[1]))
+  return answer
+
+def writeIndex(index, conlluFileName, stamp):
+  idxFile = indexFileName(conlluFileName)
+  tmpFile = idxFile + '.' + str(os.getpid()) + '.tmp'
+  try:
+    with open(tmpFile, 'w', encoding='utf-8') as f:
+      f.write(stamp+'\n')
+      for sentID in index:
+        for offset, length, linesBefore in index[sentID]:
+          f.write(sentID+'\t'+str(offset)+'\t'+str(length)+'\t'+str(linesBefore)+'\n')
+    os.replace(tmpFile, idxFile)
+  except IOError:
+    pass  # fine, it'll just be rebuilt next time
+
+# None if there's no index or it's out of date
+def readIndex(conlluFileName, stamp):
+  try:
+    with open(indexFileName(conlluFileName), encoding='utf-8') as f:
+      if f.readline().rstrip('\n') != stamp:
+        return None
+      answer = dict()
+      for line in f:
+        sentID, offset, length, linesBefore = line.rstrip('\n').rsplit('\t', 3)
+        answer.setdefault(sentID, list()).append((int(offset), int(length), int(linesBefore)))
+      return answer
+  except (IOError, ValueError):
+    return None
+
+def loadIndex(conlluFileName):
+  stamp = fileStamp(conlluFileName)
+  index = readIndex(conlluFileName, stamp)
+  if index == None:
+    index = buildIndex(conlluFileName)
+    writeIndex(index, conlluFileName, stamp)
+  return index
+
+# the lines of one sentence, given its index entry; split the same way
+# as when the whole file is read, not at e.g. U+2028 as splitlines() does
+def readSentenceLines(stream, entry):
+  offset, length, linesBefore = entry
+  stream.seek(offset)
+  return io.TextIOWrapper(io.BytesIO(stream.read(length)), encoding='utf-8').readlines()
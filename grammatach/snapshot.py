@@ -0,0 +1,71 @@
+import os
+import sys
+import glob
+import pickle
+from checker import Checker, sicDirectory
+from dictutils import UDDictionary, withoutGC
+
+# Saves a fully loaded Checker (lexicon index, lexicon lookup cache,
+# .sic data) so that later runs can restore it in one go instead of
+# re-parsing the lexicon. A snapshot is only used if none of the
+# checker's source files, .sic files or the lexicon have changed
+# since it was written; otherwise it's silently rebuilt.
+
+moduleDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# anything that, if changed, should invalidate a snapshot
+def fingerprint(languageCode, lexiconFile):
+  files = sorted(glob.glob(os.path.join(moduleDirectory, '*.py')))
+  files += sorted(glob.glob(os.path.join(sicDirectory, '*.sic')))
+  files.append(os.path.abspath(lexiconFile))
+  stats = list()
+  for f in files:
+    st = os.stat(f)
+    stats.append((f, st.st_mtime_ns, st.st_size))
+  return (tuple(sys.version_info[:2]), languageCode, tuple(stats))
+
+def defaultSnapshotFile(languageCode, lexiconFile):
+  return lexiconFile + '.' + languageCode + '.snapshot'
+
+# The fingerprint is pickled first, so a stale snapshot is rejected
+# without unpickling the rest. Returns None if there's no usable snapshot
+def readSnapshot(snapshotFile, key):
+  try:
+    with open(snapshotFile, 'rb') as f:
+      if pickle.load(f) != key:
+        return None
+      return withoutGC(pickle.load, f)
+  except (IOError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+    return None
+
+# written to a temporary file first so readers never see half a snapshot
+def writeSnapshot(checker, snapshotFile, key):
+  tmpFile = snapshotFile + '.' + str(os.getpid()) + '.tmp'
+  try:
+    with open(tmpFile, 'wb') as f:
+      pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+      pickle.dump(checker, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpFile, snapshotFile)
+  except IOError:
+    pass  # no big deal, e.g. if the lexicon directory is read-only
+
+# Returns a Checker for languageCode using lexiconFile, from the snapshot
+# if it's up to date; otherwise builds one and saves a new snapshot.
+# By default the snapshot lives next to the lexicon.
+def loadChecker(languageCode, lexiconFile=None, snapshotFile=None):
+  if lexiconFile == None:
+    return Checker(languageCode)
+  if snapshotFile == None:
+    snapshotFile = defaultSnapshotFile(languageCode, lexiconFile)
+  key = fingerprint(languageCode, lexiconFile)
+  checker = readSnapshot(snapshotFile, key)
+  if checker == None:
+    checker = Checker(languageCode, UDDictionary(lexiconFile))
+    writeSnapshot(checker, snapshotFile, key)
+  return checker
+
+# e.g. after a long run, so the warm lookup cache is kept for next time
+def saveChecker(checker, languageCode, lexiconFile, snapshotFile=None):
+  if snapshotFile == None:
+    snapshotFile = defaultSnapshotFile(languageCode, lexiconFile)
+  writeSnapshot(checker, snapshotFile, fingerprint(languageCode, lexiconFile))
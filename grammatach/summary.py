@@ -0,0 +1,79 @@
+import random
+
+# Aggregates the warnings for a whole corpus into counts per rule and
+# per (lemma, feature), with a few example locations for each, in one
+# pass over the checked sentences. Examples are kept in fixed-size
+# reservoirs, so memory depends on the number of distinct rules and
+# lemmas, not on the number of warnings.
+
+# Rows are keyed by the section a warning cites, or by its message if
+# it doesn't cite one. Lexicon messages start with the token itself,
+# which is dropped so they group together.
+def ruleKey(warning):
+  if warning.getRuleID() != None:
+    return warning.getRuleID()
+  message = warning.getMessage()
+  prefix = warning.getTokenString()+' '
+  if message.startswith(prefix):
+    return message[len(prefix):]
+  return message
+
+class WarningSummary:
+
+  # examples is the number of locations kept per row; seed makes the
+  # choice of examples repeatable from one run to the next
+  def __init__(self, examples=3, seed=0):
+    self._examples = examples
+    self._random = random.Random(seed)
+    self._total = 0
+    self._sentences = 0
+    # values are [count, first message seen, list of locations]
+    self._byRule = dict()
+    self._byLemma = dict()
+
+  # sentence is a checked UDSentence
+  def add(self, sentence):
+    warnings = sentence.getWarningRecords()
+    if warnings:
+      self._sentences += 1
+    for w in warnings:
+      self._total += 1
+      location = str(sentence.getSentID())+':'+str(w.getLineNumber())
+      key = ruleKey(w)
+      self._count(self._byRule, key, w.getMessage() if key==w.getRuleID() else key, location)
+      feature = w.getFeature() if w.getFeature() != None else '_'
+      self._count(self._byLemma, (w.getLemma(), feature), key, location)
+
+  # standard reservoir sampling: after n warnings, each of them is
+  # among the examples with equal probability
+  def _count(self, table, key, message, location):
+    if key not in table:
+      table[key] = [0, message, list()]
+    row = table[key]
+    row[0] += 1
+    if len(row[2]) < self._examples:
+      row[2].append(location)
+    else:
+      i = self._random.randrange(row[0])
+      if i < self._examples:
+        row[2][i] = location
+
+  def getTotal(self):
+    return self._total
+
+  # most frequent first
+  def _sortedRows(self, table):
+    return sorted(table.items(), key=lambda kv: (-kv[1][0], kv[0]))
+
+  # tab-separated tables; locations are sent_id:line
+  def write(self, stream):
+    stream.write('# '+str(self._total)+' warnings in '+str(self._sentences)+' sentences\n')
+    stream.write('\n# By rule\n')
+    stream.write('Count\tRule\tExample message\tExample locations\n')
+    for key, (count, message, locations) in self._sortedRows(self._byRule):
+      rule = '_' if key==message else key
+      stream.write(str(count)+'\t'+rule+'\t'+message+'\t'+' '.join(locations)+'\n')
+    stream.write('\n# By lemma and feature\n')
+    stream.write('Count\tLemma\tFeature\tExample locations\n')
+    for (lemma, feature), (count, message, locations) in self._sortedRows(self._byLemma):
+      stream.write(str(count)+'\t'+lemma+'\t'+feature+'\t'+' '.join(locations)+'\n')
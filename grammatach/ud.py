@@ -1,4 +1,6 @@
 import re
+import io
+import json
 from dictutils import UDDictionary
 from factory import TokenFactory
 
@@ -8,16 +10,22 @@ from factory import TokenFactory
 
 class UDSentence:
 
-  def __init__(self, languageCode):
+  # factory should be shared by all sentences in a corpus
+  def __init__(self, languageCode, factory=None):
     self._comments = list()
-    self._factory = TokenFactory(languageCode)
-    self._tokens = [self._factory.createToken()]
+    if factory == None:
+      factory = TokenFactory(languageCode)
+    self._factory = factory
+    self._tokens = [self._factory.createRoot()]
+    self._tokens[0].setSentence(self)
     self._sentID = None
-    # keys are UD token indices, values are indices in list self._tokens
-    self._index2index = {0: 0}
+    # heads, dependents etc. are only linked up when first needed
+    self._elaborated = False
 
   # lineNumber is the previously-read line number from this stream
   def loadFromStream(self, inputStream, lineNumber, verified):
+    # (lineNumber, line) pairs, turned into tokens in one go at the end
+    tokenLines = list()
     while True:
       lineNumber += 1
       line = inputStream.readline()
@@ -25,7 +33,7 @@ class UDSentence:
         return -1
       line = line.rstrip('\n')
       if line == '':
-        self._elaborateGraphStructure()
+        self._addTokens(tokenLines, verified)
         return lineNumber
       elif line[0] == '#':
         self._comments.append(line)
@@ -33,43 +41,145 @@ class UDSentence:
           self._sentID = line[12:]
       # default handles MWTs cleanly also
       else:
-        self._tokens.append(self._factory.createToken(lineNumber, line))
-        if not re.match('[0-9]+-',line):
-          currIndex = len(self._tokens)-1
-          udIndex = self._tokens[currIndex]['index']
-          self._index2index[udIndex] = currIndex
-          if lineNumber in verified:
-            self._tokens[currIndex].addVerified(verified[lineNumber])
-
+        tokenLines.append((lineNumber, line))
+
+  def _addTokens(self, tokenLines, verified):
+    for t in self._factory.createTokens(tokenLines):
+      self._tokens.append(t)
+      t.setSentence(self)
+      if t.getLineNumber() in verified:
+        t.addVerified(verified[t.getLineNumber()])
+
+  def getSentID(self):
+    return self._sentID
+
+  # line number of the first token, or None if there are no tokens
+  def getFirstLineNumber(self):
+    if len(self._tokens) < 2:
+      return None
+    return self._tokens[1].getLineNumber()
+
+  # True if nothing at all was read, e.g. from an extra blank line
+  def isEmpty(self):
+    return len(self._comments)==0 and len(self._tokens)==1
+
+  # iterates over the tokens proper, not the root
+  def __iter__(self):
+    return (t for t in self._tokens if not t.isRoot())
+
+  # warning strings for all tokens, in order
+  def getWarnings(self):
+    return [w for t in self._tokens if not t.isRoot() for w in t.getWarnings()]
+
+  # comment lines are only written if there were any, so an unmodified
+  # sentence comes back exactly as read
   def conlluString(self):
-    return '\n'.join(self._comments) + '\n' + '\n'.join(t.conlluString() for t in self._tokens if not t.isRoot()) + '\n'
+    comments = ''.join(c+'\n' for c in self._comments)
+    return comments + '\n'.join(t.conlluString() for t in self._tokens if not t.isRoot()) + '\n'
+
+  # True if any token's CoNLL-U line was changed on reading
+  def isModified(self):
+    return any(t.isModified() for t in self)
+
+  # one line per changed token: line number, sent_id, new CoNLL-U line
+  def writePatch(self, stream):
+    for t in self:
+      if t.isModified():
+        stream.write(str(t.getLineNumber())+'\t'+str(self._sentID)+'\t'+t.conlluString()+'\n')
+
+  def hasWarnings(self):
+    return any(t.getWarningRecords() for t in self)
+
+  # UDWarning objects for all tokens, in order
+  def getWarningRecords(self):
+    return [w for t in self for w in t.getWarningRecords()]
+
+  # writes the same text as reportString, a piece at a time
+  def writeReport(self, stream):
+    for t in self:
+      if t.getWarningRecords():
+        stream.write('\n')
+        stream.write(t.reportString())
+
+  # one JSON object per line for each warning; see UDWarning.asDict
+  def writeJSONL(self, stream):
+    for w in self.getWarningRecords():
+      stream.write(json.dumps(w.asDict(self._sentID), ensure_ascii=False))
+      stream.write('\n')
 
   def reportString(self):
-    ans = ''
-    for t in self._tokens:
-      if not t.isRoot():
-        oneReport = t.reportString()
-        if oneReport != '':
-          ans = ans + '\n' + oneReport
-    return ans
+    ans = io.StringIO()
+    self.writeReport(ans)
+    return ans.getvalue()
 
   def runChecks(self, lexicon):
+    self.elaborateGraph()
     for t in self._tokens:
       t.runChecks(lexicon)
 
-  def _elaborateGraphStructure(self):
+  # Links up heads, dependents and predecessors. Called by the tokens the
+  # first time any of these is asked for, so e.g. normalizing a file
+  # never does this work at all.
+  def elaborateGraph(self):
+    if self._elaborated:
+      return
+    self._elaborated = True
+    # keys are UD token indices, values are indices in list self._tokens
+    index2index = dict()
+    for i, t in enumerate(self._tokens):
+      t.setSentence(None)
+      if not t.isMultiwordToken():
+        index2index[t['index']] = i
+    deps = [list() for t in self._tokens]
     pred = self._tokens[0]
     # start at 1 to skip root token which has no head or predecessor
     for i in range(1,len(self._tokens)):
       t = self._tokens[i]
       if not t.isMultiwordToken():
-        if t['head'] not in self._index2index:
+        if t['head'] not in index2index:
           print('Problem with sentence',self._sentID)
-        head = self._tokens[self._index2index[t['head']]]
-        t.setHead(head)
-        head.addDependent(t)
+        headIndex = index2index[t['head']]
+        t.setHead(self._tokens[headIndex])
+        deps[headIndex].append(t)
         t.setPredecessor(pred)
         pred = t
+    for i, t in enumerate(self._tokens):
+      t.setDependents(deps[i])
+      if not t.isMultiwordToken():
+        t.indexDependents()
+    self._findFirstConjuncts()
+
+  # Sets each token's first conjunct: the token reached by following conj
+  # relations up to one that isn't a conj, whose head and deprel are then
+  # the "ultimate" ones. Paths are compressed as we go, so this is linear
+  # however long the coordinations. If conj heads loop back on themselves
+  # each token in the loop gets a warning and is its own first conjunct.
+  def _findFirstConjuncts(self):
+    for t in self._tokens:
+      if t.getFirstConjunct() != None:
+        continue
+      path = list()
+      onPath = set()
+      u = t
+      while u.getFirstConjunct() == None and u['deprel'] == 'conj' and id(u) not in onPath:
+        path.append(u)
+        onPath.add(id(u))
+        u = u.getHead()
+      if u.getFirstConjunct() != None:
+        first = u.getFirstConjunct()
+      elif id(u) in onPath:
+        cycle = path[path.index(u):]
+        indices = ', '.join(str(c['index']) for c in cycle)
+        for c in cycle:
+          c.setFirstConjunct(c)
+          c.addWarning('Cycle in conj relations through tokens '+indices)
+        first = u
+      else:
+        first = u
+        u.setFirstConjunct(u)
+      for c in path:
+        if c.getFirstConjunct() == None:
+          c.setFirstConjunct(first)
 
 #########################################################################
 # UDCorpus class                                                        #
@@ -80,32 +190,61 @@ class UDCorpus:
   def __init__(self, languageCode):
     self._sentences = list()
     self._languageCode = languageCode.upper()
+    self._factory = TokenFactory(self._languageCode)
+    self._lexicon = None
 
   def loadFromStream(self, inputStream, verified):
     lineNumber = 0
     while True:
-      sentence = UDSentence(self._languageCode)
+      sentence = UDSentence(self._languageCode, self._factory)
       lineNumber = sentence.loadFromStream(inputStream, lineNumber, verified)
       if lineNumber != -1:
         self._sentences.append(sentence)
       else:
         return
 
+  def writeConllu(self, stream):
+    for i, s in enumerate(self._sentences):
+      if i > 0:
+        stream.write('\n')
+      stream.write(s.conlluString())
+
   def conlluString(self):
-    return '\n'.join(s.conlluString() for s in self._sentences)
+    ans = io.StringIO()
+    self.writeConllu(ans)
+    return ans.getvalue()
+
+  # writes the same text as reportString, a piece at a time
+  def writeReport(self, stream):
+    for s in self._sentences:
+      if s.hasWarnings():
+        stream.write('\n')
+        s.writeReport(stream)
 
   def reportString(self):
-    ans = ''
-    for t in self._sentences:
-      oneReport = t.reportString()
-      if oneReport != '':
-        ans = ans + '\n' + oneReport
-    return ans
+    ans = io.StringIO()
+    self.writeReport(ans)
+    return ans.getvalue()
+
+  def writeJSONL(self, stream):
+    for s in self._sentences:
+      s.writeJSONL(stream)
+
+  # Call before loadFromStream to open the lexicon lazily, so that
+  # runChecks only parses the entries the corpus needs
+  def preloadLexicon(self, dictionaryFileName):
+    self._lexicon = UDDictionary(dictionaryFileName, lazy=True)
 
   def runChecks(self, dictionaryFileName=None):
-    lexicon = UDDictionary(dictionaryFileName)
+    if self._lexicon != None and dictionaryFileName == None:
+      lexicon = self._lexicon
+    else:
+      lexicon = UDDictionary(dictionaryFileName)
     for s in self._sentences:
       s.runChecks(lexicon)
 
   def __len__(self):
     return len(self._sentences)
+
+  def __iter__(self):
+    return iter(self._sentences)
@@ -0,0 +1,312 @@
+from dictutils import featureStringToDict
+from rules import UDWarning
+
+#########################################################################
+# UDToken class                                                         #
+#########################################################################
+
+class UDToken:
+  
+  labels = ('index','token','lemma','upos','xpos','morph','head','deprel','enh','other')
+  
+  def __init__(self, lineNumber=None, line=None):
+    if line==None:
+      line="0\tROOT"+"\t_"*8
+    self._lineNumber = lineNumber
+    self._line = line   # written back as is unless modified
+    self._data = {k: v for (k, v) in zip(UDToken.labels,line.split('\t'))}
+    # ranges like 3-4 for multiword tokens, and empty nodes like 3.1,
+    # which aren't in the basic tree either
+    self._isMWT = not self._data['index'].isdigit()
+    # ID and HEAD as ints, parsed once since rules compare them constantly
+    if self._isMWT:
+      self._index = None
+      self._headIndex = None
+    else:
+      self._index = int(self._data['index'])
+      # the root's HEAD is _
+      self._headIndex = None if self._data['head']=='_' else int(self._data['head'])
+    self._head = None         # will be a Token object once sentence is read
+    self._predecessor = None  # also a Token
+    self._firstConjunct = None  # also a Token; see UDSentence._findFirstConjuncts
+    self._deps = ()           # list of Tokens once sentence is read
+    # the UDSentence, until it has filled in the fields above; they're
+    # only worked out when first asked for, see UDSentence.elaborateGraph
+    self._sentence = None
+    self._featDict = featureStringToDict(self._data['morph'])
+    # same keys, but values are tuples like ('Ind', 'Int') instead of
+    # strings like 'Ind,Int'; kept in step by addFeature and killFeature
+    self._featVals = {k: tuple(v.split(',')) for k, v in self._featDict.items()}
+    self._originalMorph = self._data['morph']   # as read, before autosetFeatures
+    self._warnings = list()   # UDWarning objects
+    self._verified = dict()
+
+  # Can pass conllu field names *or* feature names
+  # Returns None if feature value is not set
+  # Note that it returns a tuple of values in case of a feature name
+  def __getitem__(self, arg):
+    if arg == 'index' or arg == 'head':
+      if self._isMWT:
+        raise ValueError('Should not be accessing index or head of a multiword token')
+      elif arg == 'index':
+        return self._index
+      else:
+        return self._headIndex
+    elif arg == 'deprel' and self._data['deprel']=='compound':
+      return 'nmod'
+    elif arg in UDToken.labels:
+      return self._data[arg]
+    else:
+      return self._featVals.get(arg)
+
+  def isMultiwordToken(self):
+    return self._isMWT
+
+  # a CoNLL-U field as a string, as written in the file (FEATS as
+  # normalized); unlike self[name], no ints and no compound -> nmod
+  def getField(self, name):
+    return self._data[name]
+
+  def getLineNumber(self):
+    return self._lineNumber
+
+  # prefix of each warning string saying where the problem is
+  def getLocator(self):
+    return '[Line '+str(self._lineNumber)+' '+str(self)+']: '
+
+  # feature and constraint say which check failed, if it was a Constraint
+  def addWarning(self, problem, feature=None, constraint=None):
+    if problem != '':
+      self._warnings.append(UDWarning(self, problem, feature, constraint))
+
+  # warnings as they appear in reports
+  def getWarnings(self):
+    return [str(w) for w in self._warnings]
+
+  def getWarningRecords(self):
+    return self._warnings
+
+  def clearWarnings(self):
+    self._warnings = list()
+
+  # everything the checks depend on, as a string; tokens with the same
+  # contentString at the same place in identical sentences get the same
+  # warnings (see dedup.py)
+  def contentString(self):
+    d = self._data
+    return '\t'.join((d['index'], d['token'], d['lemma'], d['upos'], d['morph'], d['head'], d['deprel'], ','.join(sorted(self._verified))))
+
+  def runChecks(self, lexicon):
+    if self.isMultiwordToken():
+      return
+
+    self.addWarning(lexicon.lookup(self))
+
+    for toCheck in self.checkableFeatures():
+      if toCheck in self._verified:
+        continue
+      constraintList = self.predictFeatureValue(toCheck)
+      if len(constraintList)==0:
+        self.addWarning('Warning: no constraints found for feature '+toCheck, toCheck)
+      else:
+        for constraint in constraintList:
+          if not constraint.isSatisfied(self[toCheck]):
+            self.addWarning(constraint.getMessage(), toCheck, constraint)
+
+  def predictFeatureValue(self, feat):
+    raise NotImplementedError('should only be called for specific language')
+
+  def checkableFeatures(self):
+    raise NotImplementedError('should only be called for specific language')
+    
+  # use self._data['index'] so it works for MWTs also
+  def __str__(self):
+    return '('+self._data['index']+','+self['token']+','+self['lemma']+','+self['upos']+')'
+
+  def conlluString(self):
+    if not self.isModified():
+      return self._line
+    return '\t'.join(self._data[k] for k in UDToken.labels)
+
+  # True if FEATS (the only field we ever change) differs from what
+  # was read; otherwise conlluString gives back the original line
+  def isModified(self):
+    return self._data['morph'] != self._originalMorph
+      
+  def reportString(self):
+    return '\n'.join(str(w) for w in self._warnings)
+
+  def isRoot(self):
+    return self._index==0
+
+  # A new root token for another sentence, copied from this one (a root
+  # that's never been in a sentence) rather than parsed; rules can change
+  # a head's features, so each copy gets its own fields and features
+  def copyRoot(self):
+    t = object.__new__(type(self))
+    t.__dict__.update(self.__dict__)
+    t._data = dict(self._data)
+    t._featDict = dict(self._featDict)
+    t._featVals = dict(self._featVals)
+    t._deps = ()
+    t._warnings = list()
+    t._verified = dict()
+    return t
+
+  def isAnyNominal(self):
+    return (self['upos']=='NOUN' or self['upos']=='PROPN' or self['upos']=='PRON')
+
+  def isNominal(self):
+    return (self['upos']=='NOUN' or self['upos']=='PROPN')
+
+  def setSentence(self, sentence):
+    self._sentence = sentence
+
+  def setHead(self, headToken):
+    self._head = headToken
+
+  def getHead(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._head
+
+  # self unless self is a conj, in which case the first token of the
+  # coordination, following conj relations up as far as they go
+  def getFirstConjunct(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._firstConjunct
+
+  def setFirstConjunct(self, token):
+    self._firstConjunct = token
+
+  # getHead, but goes up through coordinations
+  def getUltimateHead(self):
+    return self.getFirstConjunct().getHead()
+
+  def setPredecessor(self, predToken):
+    self._predecessor = predToken
+
+  # returns None if self is the root token, otherwise != None
+  def getPredecessor(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._predecessor
+
+  def addVerified(self, vdict):
+    self._verified = vdict
+
+  def setDependents(self, deps):
+    self._deps = deps
+
+  def getDependents(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._deps
+
+  # Called once the whole sentence is linked up, so the helpers that ask
+  # about dependents look them up here instead of scanning them all on
+  # every call. All lists keep sentence order.
+  def indexDependents(self):
+    myIndex = self['index']
+    self._precedingDeps = list()
+    self._followingDeps = list()
+    self._depsByDeprel = dict()
+    self._depsByUpos = dict()
+    self._possessiveDependent = False
+    self._articleDependent = False
+    for t in self._deps:
+      if t['index'] < myIndex:
+        self._precedingDeps.append(t)
+      else:
+        self._followingDeps.append(t)
+      self._depsByDeprel.setdefault(t['deprel'], list()).append(t)
+      self._depsByUpos.setdefault(t['upos'], list()).append(t)
+      if t.has('Poss','Yes'):
+        self._possessiveDependent = True
+      if t.has('PronType','Art'):
+        self._articleDependent = True
+
+  def getPrecedingDependents(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._precedingDeps
+
+  def getFollowingDependents(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._followingDeps
+
+  def getDependentsByDeprel(self, deprel):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._depsByDeprel.get(deprel, ())
+
+  def getDependentsByUpos(self, upos):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._depsByUpos.get(upos, ())
+
+  # True if some dependent has Poss=Yes
+  def hasPossessiveDependent(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._possessiveDependent
+
+  # True if some dependent has PronType=Art
+  def hasArticleDependent(self):
+    if self._sentence != None:
+      self._sentence.elaborateGraph()
+    return self._articleDependent
+
+  # used to recurse over coordinations but that's not really what we want
+  def isInPP(self):
+    return any(t['upos']=='ADP' for t in self.getDependentsByDeprel('case'))
+
+  def _recomputeFeatureString(self):
+    self._data['morph'] = '|'.join(k+'='+self._featDict[k] for k in sorted(self._featDict) if k[0]!='X') or '_'
+  
+  def addFeature(self, featName, featVal):
+    vals = []
+    if featName in self._featDict:
+      vals = self._featDict[featName].split(',')
+    if featVal not in vals:
+      vals.append(featVal)
+      vals.sort()
+      self._featDict[featName] = ','.join(vals)
+      self._featVals[featName] = tuple(vals)
+      self._recomputeFeatureString()
+
+  def killFeature(self, featName, featVal):
+    if featName in self._featDict:
+      vals = self._featDict[featName].split(',')
+      if featVal in vals:
+        vals.remove(featVal)
+        if len(vals) > 0:
+          self._featDict[featName] = ','.join(vals)
+          self._featVals[featName] = tuple(vals)
+          self._recomputeFeatureString()
+        else:
+          del self._featDict[featName]
+          del self._featVals[featName]
+        self._recomputeFeatureString()
+
+  # just used in dictutils.py
+  def getFeatureDict(self):
+    return self._featDict
+
+  # exact match, so e.g. Form=Indirect doesn't count as Form=Ind
+  def has(self, feature, featureVal):
+    return featureVal in self._featVals.get(feature, ())
+
+  def getDeprel(self):
+    return self['deprel']
+
+  def getUltimateDeprel(self):
+    return self.getFirstConjunct()['deprel']
+
+  # overridden for Irish (tAcht -> t-acht), potentially others
+  def lowerToken(self):
+    return self['token'].lower()
+
+  __repr__ = __str__
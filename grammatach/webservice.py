@@ -0,0 +1,194 @@
+import sys
+import json
+import time
+import asyncio
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from daemon import CheckerPool
+
+# HTTP/JSON front end for the checker, e.g. for a web annotation tool.
+# POST a JSON object {"lang": "ga", "conllu": "..."} to
+#   /check      returns {"sentences": [{"sent_id": ..., "warnings": [...]}, ...]}
+#   /normalize  returns {"conllu": "..."}
+# GET /stats returns request latency percentiles in milliseconds.
+#
+# Checking is CPU-bound, so it runs in a pool of worker processes, each
+# with its own warm CheckerPool (and lexicons). Requests that arrive
+# close together are sent to a worker as a single batch.
+
+def printUsage():
+  print("Usage: python3 webservice.py [-p port] [-w workers] [ga=tagdict.tsv ...]")
+  print("       Serves /check, /normalize and /stats on localhost until killed.")
+  print("       Optional arguments give the lexicon to use for each language.")
+
+# one per worker process
+workerPool = None
+
+def initWorker(lexiconFiles):
+  global workerPool
+  workerPool = CheckerPool(lexiconFiles)
+
+# runs in a worker; one failed request shouldn't sink the whole batch.
+# Each request is (path, languageCode, text); /normalize skips the checks
+def runBatch(requests):
+  answer = list()
+  for path, languageCode, text in requests:
+    try:
+      if path == '/normalize':
+        answer.append((True, workerPool.normalize(languageCode, text)))
+      else:
+        answer.append((True, workerPool.check(languageCode, text)))
+    except Exception as e:
+      answer.append((False, repr(e)))
+  return answer
+
+class BatchDispatcher:
+
+  # waits up to maxDelay seconds for up to maxBatch requests to gather
+  def __init__(self, executor, maxBatch=32, maxDelay=0.002):
+    self._executor = executor
+    self._maxBatch = maxBatch
+    self._maxDelay = maxDelay
+    self._waiting = list()
+    self._timer = None
+
+  # path is /check or /normalize
+  async def submit(self, path, languageCode, text):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    self._waiting.append(((path, languageCode, text), future))
+    if len(self._waiting) >= self._maxBatch:
+      self._dispatch()
+    elif self._timer == None:
+      self._timer = loop.call_later(self._maxDelay, self._dispatch)
+    ok, result = await future
+    if not ok:
+      raise ValueError(result)
+    return result
+
+  def _dispatch(self):
+    if self._timer != None:
+      self._timer.cancel()
+      self._timer = None
+    batch = self._waiting
+    self._waiting = list()
+    if batch:
+      done = asyncio.get_running_loop().run_in_executor(self._executor, runBatch, [r for r, f in batch])
+      done.add_done_callback(lambda d: self._deliver(batch, d))
+
+  def _deliver(self, batch, done):
+    # skip requests whose client has already gone away
+    if done.exception() != None:
+      for r, f in batch:
+        if not f.done():
+          f.set_exception(done.exception())
+    else:
+      for (r, f), result in zip(batch, done.result()):
+        if not f.done():
+          f.set_result(result)
+
+class LatencyStats:
+
+  # only the most recent requests are kept
+  def __init__(self, size=10000):
+    self._times = collections.deque(maxlen=size)
+    self._count = 0
+
+  def add(self, seconds):
+    self._times.append(seconds)
+    self._count += 1
+
+  def summary(self):
+    ans = {'requests': self._count}
+    ordered = sorted(self._times)
+    for p in [50, 90, 99]:
+      if ordered:
+        ans['p'+str(p)] = round(1000*ordered[min(len(ordered)-1, len(ordered)*p//100)], 3)
+      else:
+        ans['p'+str(p)] = None
+    return ans
+
+class CheckService:
+
+  def __init__(self, dispatcher):
+    self._dispatcher = dispatcher
+    self._stats = LatencyStats()
+
+  # returns (status, response object)
+  async def respond(self, method, path, body):
+    if method=='GET' and path=='/stats':
+      return 200, self._stats.summary()
+    if method!='POST' or path not in ['/check', '/normalize']:
+      return 404, {'error': 'Not found'}
+    try:
+      request = json.loads(body)
+      languageCode, text = request['lang'], request['conllu']
+    except (ValueError, KeyError, TypeError):
+      return 400, {'error': 'Expected JSON object with "lang" and "conllu"'}
+    start = time.perf_counter()
+    try:
+      result = await self._dispatcher.submit(path, languageCode, text)
+    except ValueError as e:
+      return 400, {'error': str(e)}
+    finally:
+      self._stats.add(time.perf_counter()-start)
+    if path=='/check':
+      return 200, {'sentences': [{'sent_id': s['sent_id'], 'warnings': s['warnings']} for s in result]}
+    return 200, {'conllu': '\n'.join(result)}
+
+  # bare-bones HTTP/1.1 with keep-alive; enough for a local front end
+  async def handleConnection(self, reader, writer):
+    try:
+      while True:
+        requestLine = await reader.readline()
+        if not requestLine:
+          break
+        method, path, version = requestLine.decode('latin-1').split()
+        headers = dict()
+        while True:
+          line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+          if line == '':
+            break
+          k, v = line.split(':', 1)
+          headers[k.strip().lower()] = v.strip()
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+        status, response = await self.respond(method, path, body)
+        payload = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+        writer.write(('HTTP/1.1 '+str(status)+' '+reasons[status]+'\r\n'+
+                      'Content-Type: application/json; charset=utf-8\r\n'+
+                      'Content-Length: '+str(len(payload))+'\r\n\r\n').encode('latin-1')+payload)
+        await writer.drain()
+        if headers.get('connection', '').lower()=='close':
+          break
+    except (ValueError, asyncio.IncompleteReadError, ConnectionResetError):
+      pass
+    writer.close()
+
+async def serve(port, workers, lexiconFiles):
+  with ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(lexiconFiles,)) as executor:
+    service = CheckService(BatchDispatcher(executor))
+    server = await asyncio.start_server(service.handleConnection, '127.0.0.1', port)
+    async with server:
+      await server.serve_forever()
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  port = 8080
+  workers = None
+  try:
+    if '-p' in args:
+      i = args.index('-p')
+      port = int(args[i+1])
+      del args[i:i+2]
+    if '-w' in args:
+      i = args.index('-w')
+      workers = int(args[i+1])
+      del args[i:i+2]
+  except (ValueError, IndexError):
+    printUsage()
+    sys.exit(1)
+  if any('=' not in arg for arg in args):
+    printUsage()
+    sys.exit(1)
+  asyncio.run(serve(port, workers, dict(arg.split('=', 1) for arg in args)))